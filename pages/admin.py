@@ -1,11 +1,30 @@
+import time
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.conf import settings
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from django.urls import reverse
+from django.urls import path, reverse
 from django.db.models import Sum, Count
+from .admin_mixins import CachedRelatedFieldListFilter, CachedRelatedOnlyFieldListFilter, FastChangeListMixin
+from .catalog import change_prices, move_to_category
+from .courier import apply_status_updates
+from .exports import EXPORT_FORMATS, export_filename, filter_orders, stream_export
+from .imports import ImportFileError, detect_format, import_products, open_upload
+from .promos import duplicate_promo_codes, generate_promo_codes, invalidate_promos
+from .promotions import invalidate_promotions
+from .sales import dashboard
+from .taskqueue import retry_failed
 from .models import (
     Category, Product, CartItem, Order, OrderItem, 
-    Profile, Wishlist, PromoCode, PromoCodeUsage
+    Profile, Wishlist, PromoCode, PromoCodeUsage, ArchivedOrder, ArchivedOrderItem, JobRun,
+    PromoCodeRandomizer, PromoCodeDailyStat, PromotionRule, DailyOrderFact, DailyCategoryFact, Task,
+    MediaBlob,
 )
 
 
@@ -17,6 +36,9 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'image_preview', 'slug', 'product_count')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(products_total=Count('product'))
     
     def image_preview(self, obj):
         if obj.image:
@@ -28,28 +50,49 @@ class CategoryAdmin(admin.ModelAdmin):
     image_preview.short_description = '🖼️ Фото'
     
     def product_count(self, obj):
-        count = obj.product_set.count()
         return format_html(
             '<span style="background: #e3f2fd; color: #1976d2; padding: 4px 12px; border-radius: 12px; font-weight: 600;">{} товаров</span>',
-            count
+            obj.products_total
         )
     product_count.short_description = '📦 Товаров'
+    product_count.admin_order_field = 'products_total'
 
 
 # ============================================
 # ПРОДУКТЫ
 # ============================================
+class ChangePricesForm(forms.Form):
+    percent = forms.DecimalField(
+        label='Изменить цену на, %', max_digits=5, decimal_places=2, min_value=-90, max_value=1000,
+        help_text='Отрицательное значение — снижение цены',
+    )
+
+
+class MoveCategoryForm(forms.Form):
+    category = forms.ModelChoiceField(label='Новая категория', queryset=Category.objects.all())
+
+
+class ImportProductsForm(forms.Form):
+    file = forms.FileField(label='Файл каталога (CSV или JSONL)')
+
+
+def bulk_progress_message(done, chunks, started):
+    return f'{done} строк, партий: {chunks}, {time.monotonic() - started:.1f} с'
+
+
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('image_preview', 'name', 'price_display', 'category', 'unit_type', 'created_display')
-    list_filter = ('category', 'unit_type', 'created_at')
-    search_fields = ('name', 'description')
+    list_select_related = ('category',)
+    list_filter = (('category', CachedRelatedFieldListFilter), 'unit_type', 'created_at')
+    search_fields = ('name', 'sku', 'description')
     list_per_page = 25
     date_hierarchy = 'created_at'
+    actions = ['change_prices', 'move_to_category']
     
     fieldsets = (
         ('📝 Основная информация', {
-            'fields': ('name', 'description', 'category')
+            'fields': ('name', 'sku', 'description', 'category')
         }),
         ('💰 Цена и единицы', {
             'fields': ('price', 'unit_type')
@@ -79,6 +122,94 @@ class ProductAdmin(admin.ModelAdmin):
         return obj.created_at.strftime('%d.%m.%Y %H:%M')
     created_display.short_description = '📅 Создан'
 
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='pages_product_import'),
+            *super().get_urls(),
+        ]
+
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            raise PermissionDenied
+        form = ImportProductsForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            started = time.monotonic()
+            try:
+                result = import_products(
+                    open_upload(upload), detect_format(upload.name), getattr(settings, 'CATALOG_IMPORT_IMAGES_DIR', None)
+                )
+            except ImportFileError as exc:
+                result = exc.result
+                form.add_error('file', f'Не удалось прочитать файл: {exc} '
+                                       f'(создано {result.created}, обновлено {result.updated})')
+                return self._import_page(request, form)
+            self.message_user(
+                request,
+                f'📥 Создано {result.created}, обновлено {result.updated}, новых категорий '
+                f'{result.categories_created} ({time.monotonic() - started:.1f} с)',
+                level='success',
+            )
+            if result.errors:
+                shown = '; '.join(f'строка {line}: {message}' for line, message in result.errors[:10])
+                self.message_user(request, f'⚠️ Пропущено {result.skipped}: {shown}', level='warning')
+            return HttpResponseRedirect(reverse('admin:pages_product_changelist'))
+        return self._import_page(request, form)
+
+    def _import_page(self, request, form):
+        return TemplateResponse(request, 'admin/pages/product/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': '📥 Импорт каталога',
+            'form': form,
+        })
+
+    def _action_form_page(self, request, queryset, form, action, title):
+        return TemplateResponse(request, 'admin/pages/product/bulk_action.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': title,
+            'form': form,
+            'action': action,
+            'count': queryset.count(),
+            # «Выбрать все N» передаётся дальше флагом, а не списком из десятков тысяч id
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    def change_prices(self, request, queryset):
+        form = ChangePricesForm(request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return self._action_form_page(request, queryset, form, 'change_prices', '💲 Изменение цен')
+        percent = form.cleaned_data['percent']
+        chunks = []
+        started = time.monotonic()
+        updated = change_prices(queryset, percent, progress=lambda done, total: chunks.append(done))
+        self.message_user(
+            request,
+            f'💲 Цены изменены на {percent:+}%: {bulk_progress_message(updated, len(chunks), started)}',
+            level='success',
+        )
+        return None
+    change_prices.short_description = '💲 Изменить цены на %%'
+
+    def move_to_category(self, request, queryset):
+        form = MoveCategoryForm(request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return self._action_form_page(request, queryset, form, 'move_to_category', '📁 Перенос в категорию')
+        category = form.cleaned_data['category']
+        chunks = []
+        started = time.monotonic()
+        moved = move_to_category(queryset, category, progress=lambda done, total: chunks.append(done))
+        self.message_user(
+            request,
+            f'📁 Перенесено в «{category}»: {bulk_progress_message(moved, len(chunks), started)}',
+            level='success',
+        )
+        return None
+    move_to_category.short_description = '📁 Перенести в категорию'
+
 
 # ============================================
 # ПРОМОКОДЫ
@@ -282,30 +413,107 @@ class PromoCodeAdmin(admin.ModelAdmin):
     
     def activate_codes(self, request, queryset):
         updated = queryset.update(is_active=True)
+        invalidate_promos()
         self.message_user(request, f'✅ Активировано {updated} промокодов', level='success')
     activate_codes.short_description = '✅ Активировать'
     
     def deactivate_codes(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_promos()
         self.message_user(request, f'❌ Деактивировано {updated} промокодов', level='warning')
     deactivate_codes.short_description = '❌ Деактивировать'
     
     def duplicate_codes(self, request, queryset):
-        count = queryset.count()
-        for promo in queryset:
-            promo.pk = None
-            promo.code = f"{promo.code}_COPY"
-            promo.times_used = 0
-            promo.save()
-        self.message_user(request, f'📋 Создано {count} копий', level='success')
+        chunks = []
+        started = time.monotonic()
+        created = duplicate_promo_codes(queryset, progress=lambda done, total: chunks.append(done))
+        self.message_user(
+            request, f'📋 Создано копий: {bulk_progress_message(created, len(chunks), started)}', level='success'
+        )
     duplicate_codes.short_description = '📋 Дублировать'
 
 
+# ============================================
+# АКЦИИ
+# ============================================
+@admin.register(PromotionRule)
+class PromotionRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'kind', 'scope', 'category', 'product', 'priority', 'stackable', 'is_active', 'valid_until']
+    list_select_related = ['category', 'product']
+    list_filter = ['kind', 'scope', 'is_active', 'stackable']
+    search_fields = ['name']
+    autocomplete_fields = ['category', 'product']
+    actions = ['activate_rules', 'deactivate_rules']
+
+    fieldsets = (
+        ('🏷️ Акция', {
+            'fields': ('name', 'kind', 'is_active')
+        }),
+        ('🎯 Область', {
+            'fields': ('scope', 'category', 'product')
+        }),
+        ('💰 Параметры', {
+            'fields': ('percentage', 'amount', 'buy_quantity', 'get_quantity', 'tiers')
+        }),
+        ('⚙️ Порядок и сроки', {
+            'fields': ('priority', 'stackable', 'valid_from', 'valid_until')
+        }),
+    )
+
+    def activate_rules(self, request, queryset):
+        updated = queryset.update(is_active=True)
+        invalidate_promotions()
+        self.message_user(request, f'✅ Активировано {updated} акций', level='success')
+    activate_rules.short_description = '✅ Активировать'
+
+    def deactivate_rules(self, request, queryset):
+        updated = queryset.update(is_active=False)
+        invalidate_promotions()
+        self.message_user(request, f'❌ Деактивировано {updated} акций', level='warning')
+    deactivate_rules.short_description = '❌ Деактивировать'
+
+
+# ============================================
+# ГЕНЕРАТОР ПРОМОКОДОВ
+# ============================================
+class GenerateCodesForm(forms.Form):
+    # Больше — через manage.py generate_promo_codes, чтобы не упираться в таймаут запроса
+    MAX_COUNT = 50000
+
+    count = forms.IntegerField(label='Сколько кодов на шаблон', min_value=1, max_value=MAX_COUNT, initial=1000)
+
+
+@admin.register(PromoCodeRandomizer)
+class PromoCodeRandomizerAdmin(admin.ModelAdmin):
+    list_display = ['name', 'discount_type', 'code_prefix', 'usage_limit', 'valid_days', 'is_active']
+    list_filter = ['discount_type', 'is_active']
+    search_fields = ['name', 'code_prefix']
+    actions = ['generate_codes']
+
+    def generate_codes(self, request, queryset):
+        form = GenerateCodesForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            count = form.cleaned_data['count']
+            total = 0
+            for template in queryset.filter(is_active=True):
+                total += generate_promo_codes(template, count)
+            self.message_user(request, f'🎲 Создано {total} промокодов', level='success')
+            return None
+        return TemplateResponse(request, 'admin/pages/promocoderandomizer/generate_codes.html', {
+            **self.admin_site.each_context(request),
+            'title': '🎲 Генерация промокодов',
+            'form': form,
+            'queryset': queryset,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    generate_codes.short_description = '🎲 Сгенерировать промокоды'
+
+
 # ============================================
 # ИСТОРИЯ ИСПОЛЬЗОВАНИЯ ПРОМОКОДОВ
 # ============================================
 @admin.register(PromoCodeUsage)
-class PromoCodeUsageAdmin(admin.ModelAdmin):
+class PromoCodeUsageAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = [
         'promo_badge',
         'order_link',
@@ -313,8 +521,10 @@ class PromoCodeUsageAdmin(admin.ModelAdmin):
         'amounts_display',
         'date_display'
     ]
+    list_select_related = ['promo_code', 'order', 'user']
     
-    list_filter = ['used_at', 'promo_code']
+    # RelatedOnly: в фильтре только использованные коды, а не все сгенерированные
+    list_filter = ['used_at', ('promo_code', CachedRelatedOnlyFieldListFilter)]
     search_fields = ['promo_code__code', 'user__username']
     readonly_fields = ['promo_code', 'order', 'order_amount', 'discount_amount', 'user', 'used_at']
     date_hierarchy = 'used_at'
@@ -369,11 +579,61 @@ class PromoCodeUsageAdmin(admin.ModelAdmin):
         return False
 
 
+# ============================================
+# ОТЧЁТ ПО ПРОМОКОДАМ (суточные сводки)
+# ============================================
+@admin.register(PromoCodeDailyStat)
+class PromoCodeDailyStatAdmin(admin.ModelAdmin):
+    list_display = ['day', 'promo_code', 'redemptions', 'gross_order_amount', 'total_discount']
+    list_select_related = ['promo_code']
+    list_filter = [('promo_code', admin.RelatedOnlyFieldListFilter)]
+    search_fields = ['promo_code__code']
+    date_hierarchy = 'day'
+    list_per_page = 100
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        # Итоги считаются по сводкам, а не по сырому журналу — O(дней × кодов)
+        if hasattr(response, 'context_data') and 'cl' in response.context_data:
+            response.context_data['totals'] = response.context_data['cl'].queryset.aggregate(
+                redemptions=Sum('redemptions'),
+                gross=Sum('gross_order_amount'),
+                discount=Sum('total_discount'),
+            )
+        return response
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ============================================
 # ЗАКАЗЫ
 # ============================================
+class ExportOrdersForm(forms.Form):
+    kind = forms.ChoiceField(
+        label='Что выгрузить', choices=[('orders', 'Заказы'), ('items', 'Позиции заказов')], initial='orders'
+    )
+    fmt = forms.ChoiceField(label='Формат', choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], initial='csv')
+    date_from = forms.DateField(label='С даты', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(label='По дату', required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    statuses = forms.MultipleChoiceField(
+        label='Статусы', choices=Order.STATUS_CHOICES, required=False, widget=forms.CheckboxSelectMultiple
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        # Перепутанные даты дали бы пустой файл без всякого предупреждения
+        if date_from and date_to and date_from > date_to:
+            self.add_error('date_to', 'Дата «по» раньше даты «с»')
+        return cleaned_data
+
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = [
         'order_badge',
         'user_info',
@@ -382,11 +642,13 @@ class OrderAdmin(admin.ModelAdmin):
         'promo_info',
         'created_display'
     ]
+    list_select_related = ['user', 'promo_code']
     
-    list_filter = ['status', 'created_at', 'promo_code']
+    list_filter = ['status', 'created_at', ('promo_code', CachedRelatedOnlyFieldListFilter)]
     search_fields = ['order_number', 'user__username', 'delivery_city']
     readonly_fields = ['order_number', 'created_at', 'updated_at']
     date_hierarchy = 'created_at'
+    actions = ['mark_shipping', 'mark_delivered', 'mark_picked_up', 'export_orders']
     
     fieldsets = (
         ('📦 Информация о заказе', {
@@ -427,6 +689,7 @@ class OrderAdmin(admin.ModelAdmin):
             'shipping':   ('#cfe2ff', '#084298', '🚚'),
             'delivered':  ('#d4edda', '#155724', '✅'),
             'picked-up':  ('#e7d4f5', '#6f42c1', '🎉'),
+            'returned':   ('#e2e3e5', '#41464b', '↩️'),
             'cancelled':  ('#f8d7da', '#721c24', '❌'),
         }
         bg, text, icon = colors.get(obj.status, ('#e2e3e5', '#383d41', '❓'))
@@ -464,6 +727,144 @@ class OrderAdmin(admin.ModelAdmin):
         return obj.created_at.strftime('%d.%m.%Y %H:%M')
     created_display.short_description = '📅 Создан'
 
+    def _set_status(self, request, queryset, new_status):
+        numbers = queryset.values_list('order_number', flat=True)
+        result = apply_status_updates([(number, new_status) for number in numbers])
+        self.message_user(request, f'✅ Обновлено {len(result["updated"])} заказов', level='success')
+        if result['errors']:
+            # Причины разные (не найден, недопустимый переход, изменён параллельно) — группируем
+            reasons = {}
+            for error in result['errors']:
+                reasons.setdefault(error['error'], []).append(error['order_number'])
+            details = '; '.join(
+                f'{reason} — {", ".join(numbers[:5])}{" …" if len(numbers) > 5 else ""}'
+                for reason, numbers in reasons.items()
+            )
+            self.message_user(request, f'⚠️ Пропущено {len(result["errors"])}: {details}', level='warning')
+
+    def mark_shipping(self, request, queryset):
+        self._set_status(request, queryset, 'shipping')
+    mark_shipping.short_description = '🚚 Доставляется'
+
+    def mark_delivered(self, request, queryset):
+        self._set_status(request, queryset, 'delivered')
+    mark_delivered.short_description = '✅ Доставлен'
+
+    def mark_picked_up(self, request, queryset):
+        self._set_status(request, queryset, 'picked-up')
+    mark_picked_up.short_description = '🎉 Выдан покупателю'
+
+    def export_orders(self, request, queryset):
+        form = ExportOrdersForm(request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return TemplateResponse(request, 'admin/pages/order/export.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': '📤 Выгрузка заказов',
+                'form': form,
+                'select_across': request.POST.get('select_across') == '1',
+                'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+        data = form.cleaned_data
+        filters = {'date_from': data['date_from'], 'date_to': data['date_to'], 'statuses': data['statuses']}
+        orders = filter_orders(queryset, **filters)
+        # «Выбрать все» — выгрузка за период, вместе с архивом: там лежат закрытые продажи.
+        # Отмеченные вручную строки — только они (архивных в этом списке нет)
+        archived = None
+        if request.POST.get('select_across') == '1':
+            archived = filter_orders(model=ArchivedOrder, **filters)
+        response = StreamingHttpResponse(
+            stream_export(orders, data['kind'], data['fmt'], archived=archived),
+            content_type=EXPORT_FORMATS[data['fmt']],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(data["kind"], data["fmt"])}"'
+        return response
+    export_orders.short_description = '📤 Выгрузить CSV / JSONL'
+
+
+# ============================================
+# ДАШБОРД ПРОДАЖ (витрина фактов, pages/sales.py)
+# ============================================
+class ReadOnlyFactAdmin(admin.ModelAdmin):
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyOrderFact)
+class DailyOrderFactAdmin(ReadOnlyFactAdmin):
+    list_display = ['day', 'city', 'orders', 'items', 'revenue', 'discount', 'delivery_cost']
+    list_filter = ['city']
+    date_hierarchy = 'day'
+    DASHBOARD_PERIODS = (7, 30, 90, 365)
+
+    def get_urls(self):
+        return [
+            path('dashboard/', self.admin_site.admin_view(self.dashboard_view), name='pages_sales_dashboard'),
+            *super().get_urls(),
+        ]
+
+    def dashboard_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        if days not in self.DASHBOARD_PERIODS:
+            days = 30
+        return TemplateResponse(request, 'admin/pages/dailyorderfact/dashboard.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': '📈 Продажи',
+            'periods': self.DASHBOARD_PERIODS,
+            **dashboard(days),
+        })
+
+
+@admin.register(DailyCategoryFact)
+class DailyCategoryFactAdmin(ReadOnlyFactAdmin):
+    list_display = ['day', 'category', 'city', 'orders', 'quantity', 'revenue']
+    list_select_related = ['category']
+    list_filter = [('category', admin.RelatedOnlyFieldListFilter)]
+    date_hierarchy = 'day'
+
+
+# ============================================
+# АРХИВ ЗАКАЗОВ
+# ============================================
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ['product', 'quantity', 'price']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ['order_number', 'user', 'status', 'total_amount', 'created_at', 'archived_at']
+    list_select_related = ['user']
+    list_filter = ['status']
+    search_fields = ['order_number', 'user__username']
+    inlines = [ArchivedOrderItemInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 # ============================================
 # ОСТАЛЬНЫЕ МОДЕЛИ
@@ -471,6 +872,8 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'price', 'subtotal_display']
+    # order__user — для Order.__str__
+    list_select_related = ['order__user', 'product']
     list_filter = ['order__created_at']
     search_fields = ['product__name', 'order__order_number']
     
@@ -485,6 +888,7 @@ class OrderItemAdmin(admin.ModelAdmin):
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ['user', 'product', 'quantity', 'subtotal_display', 'added_at']
+    list_select_related = ['user', 'product']
     list_filter = ['added_at']
     search_fields = ['user__username', 'product__name']
     
@@ -499,6 +903,7 @@ class CartItemAdmin(admin.ModelAdmin):
 @admin.register(Wishlist)
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ['user', 'product', 'added_at']
+    list_select_related = ['user', 'product']
     list_filter = ['added_at']
     search_fields = ['user__username', 'product__name']
 
@@ -506,6 +911,7 @@ class WishlistAdmin(admin.ModelAdmin):
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'nickname', 'rating_display']
+    list_select_related = ['user']
     search_fields = ['user__username', 'nickname']
     
     def rating_display(self, obj):
@@ -514,4 +920,66 @@ class ProfileAdmin(admin.ModelAdmin):
             '<div style="font-size: 16px;">{} <span style="color: #666; font-size: 12px;">({}/5)</span></div>',
             stars, obj.rating
         )
-    rating_display.short_description = '⭐ Рейтинг'
\ No newline at end of file
+    rating_display.short_description = '⭐ Рейтинг'
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ['name', 'started_at', 'duration_ms', 'processed', 'success']
+    list_filter = ['name', 'success']
+    readonly_fields = ['name', 'started_at', 'finished_at', 'duration_ms', 'processed', 'success', 'details']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status_badge', 'attempts', 'run_after', 'locked_by', 'error_line']
+    list_filter = ['status', 'name']
+    search_fields = ['name']
+    readonly_fields = [
+        'name', 'args', 'kwargs', 'status', 'attempts', 'max_attempts', 'run_after',
+        'locked_until', 'locked_by', 'last_error', 'created_at',
+    ]
+    actions = ['retry_tasks']
+
+    def has_add_permission(self, request):
+        return False
+
+    def status_badge(self, obj):
+        icons = {'queued': '⏳', 'running': '⚙️', 'failed': '❌'}
+        return f'{icons.get(obj.status, "❓")} {obj.get_status_display()}'
+    status_badge.short_description = '📊 Статус'
+
+    def error_line(self, obj):
+        # Последняя строка traceback — сам текст исключения
+        return obj.last_error.strip().splitlines()[-1] if obj.last_error else '—'
+    error_line.short_description = 'Ошибка'
+
+    def retry_tasks(self, request, queryset):
+        count = retry_failed(queryset)
+        self.message_user(request, f'🔁 Возвращено в очередь: {count}')
+    retry_tasks.short_description = '🔁 Повторить упавшие задачи'
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['path', 'size_kb', 'refcount', 'updated_at']
+    list_filter = ['refcount']
+    search_fields = ['path']
+    readonly_fields = ['path', 'size', 'refcount', 'created_at', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Счётчик ведут сигналы и gc_media_blobs; удаляет файлы только сборщик
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def size_kb(self, obj):
+        return f'{obj.size / 1024:.1f} КБ'
+    size_kb.short_description = '💾 Размер'
@@ -0,0 +1,302 @@
+"""
+Быстрые списки в админке для больших таблиц (заказы, товары, промокоды).
+
+Стандартный changelist на каждое открытие считает COUNT(*) два раза
+(выборка и вся таблица), строит иерархию дат через MIN/MAX и
+SELECT DISTINCT по усечённой дате — полный проход по таблице — и
+собирает варианты RelatedOnly-фильтров тоже проходом по таблице.
+
+FastChangeListMixin:
+- не считает всю таблицу (show_full_result_count = False), а число строк
+  выборки берёт из кэша; на PostgreSQL большие выборки оцениваются
+  планировщиком (EXPLAIN) вместо COUNT(*);
+- строит иерархию дат рыхлым проходом по индексу поля (запрос на
+  непустой год / месяц / день) и кэширует списки корзин;
+- вместе с CachedRelatedFieldListFilter / CachedRelatedOnlyFieldListFilter
+  кэширует варианты фильтров.
+
+Все кэши живут по таймауту: новый день в иерархии или новый промокод в
+фильтре появятся не позже чем через *_cache_timeout секунд. Исключение —
+сохранение и удаление через саму админку: оно сразу сбрасывает кэш
+вариантов фильтров этой модели.
+"""
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+
+from django.contrib import admin
+from django.contrib.admin.templatetags import admin_list
+from django.contrib.admin.utils import get_fields_from_path
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, models, transaction
+from django.utils import formats, timezone
+from django.utils.functional import cached_property
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+
+COUNT_CACHE_TIMEOUT = 60
+DATE_HIERARCHY_CACHE_TIMEOUT = 300
+FILTER_CHOICES_CACHE_TIMEOUT = 300
+# Ниже этой оценки планировщика считаем точно: COUNT(*) и так дешёвый
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def _queryset_key(prefix, queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+    return f'{prefix}:{queryset.model._meta.label_lower}:{digest}'
+
+
+def _planner_estimate(queryset):
+    """Оценка числа строк планировщиком PostgreSQL; None на других базах."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    Число строк выборки из кэша. Большие выборки на PostgreSQL не
+    считаются вовсе — берётся оценка планировщика, остальные — COUNT(*).
+    """
+    key = _queryset_key('admin:count', queryset)
+    count = cache.get(key)
+    if count is None:
+        count = _planner_estimate(queryset)
+        if count is None or count < EXACT_COUNT_THRESHOLD:
+            count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    count_cache_timeout = COUNT_CACHE_TIMEOUT
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list, self.count_cache_timeout)
+
+
+# ============================================
+# ИЕРАРХИЯ ДАТ
+# ============================================
+def _cached(key, compute, timeout):
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def _bounds(field, start, end):
+    """Границы [start, end) для фильтра по полю: aware datetime или date."""
+    if isinstance(field, models.DateTimeField):
+        return (
+            timezone.make_aware(datetime.combine(start, datetime.min.time())),
+            timezone.make_aware(datetime.combine(end, datetime.min.time())),
+        )
+    return start, end
+
+
+def _local_date(field, value):
+    if isinstance(field, models.DateTimeField):
+        return timezone.localtime(value).date()
+    return value
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+BUCKETS = {
+    # вид корзины -> (начало корзины по дате, начало следующей)
+    'year': (lambda day: date(day.year, 1, 1), lambda day: date(day.year + 1, 1, 1)),
+    'month': (lambda day: date(day.year, day.month, 1), _next_month),
+    'day': (lambda day: day, lambda day: day + timedelta(days=1)),
+}
+
+
+def date_range(queryset, field_name):
+    """Первая и последняя дата выборки (два чтения по краям индекса вместо MIN/MAX)."""
+    field = get_fields_from_path(queryset.model, field_name)[-1]
+    values = queryset.values_list(field_name, flat=True)
+    first = values.order_by(field_name).first()
+    if first is None:
+        return None, None
+    last = values.order_by(f'-{field_name}').first()
+    return _local_date(field, first), _local_date(field, last)
+
+
+def date_buckets(queryset, field_name, kind, start, end):
+    """
+    Начала корзин kind ('year', 'month', 'day') в [start, end), где есть строки.
+    Рыхлый проход по индексу поля: берётся первая дата не раньше курсора,
+    курсор прыгает на следующую корзину — по запросу на непустую корзину
+    плюс один, вместо SELECT DISTINCT по всем строкам.
+    """
+    field = get_fields_from_path(queryset.model, field_name)[-1]
+    values = queryset.order_by(field_name).values_list(field_name, flat=True)
+    truncate, following = BUCKETS[kind]
+    buckets = []
+    cursor = start
+    while cursor < end:
+        lower, upper = _bounds(field, cursor, end)
+        value = values.filter(**{f'{field_name}__gte': lower, f'{field_name}__lt': upper}).first()
+        if value is None:
+            break
+        bucket = truncate(_local_date(field, value))
+        buckets.append(bucket)
+        cursor = following(bucket)
+    return buckets
+
+
+def fast_date_hierarchy(cl):
+    """
+    То же, что admin_list.date_hierarchy, но на кэшированных корзинах.
+    Для админок без FastChangeListMixin отдаёт стандартную иерархию.
+    """
+    model_admin = cl.model_admin
+    if not isinstance(model_admin, FastChangeListMixin):
+        return admin_list.date_hierarchy(cl)
+
+    field_name = cl.date_hierarchy
+    year_field = f'{field_name}__year'
+    month_field = f'{field_name}__month'
+    day_field = f'{field_name}__day'
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+    timeout = model_admin.date_hierarchy_cache_timeout
+    # Уже отфильтрована по выбранному году / месяцу и остальным фильтрам
+    queryset = cl.queryset
+    key = _queryset_key('admin:dates', queryset)
+
+    def buckets(kind, start, end):
+        return _cached(
+            f'{key}:{kind}:{start}', lambda: date_buckets(queryset, field_name, kind, start, end), timeout
+        )
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{field_name}__'])
+
+    first = last = None
+    if not (year_lookup or month_lookup or day_lookup):
+        # Как и стандартная иерархия — сразу к месяцам или дням, если данных мало
+        first, last = _cached(f'{key}:range', lambda: date_range(queryset, field_name), timeout)
+        if first and first.year == last.year:
+            year_lookup = first.year
+            if first.month == last.month:
+                month_lookup = first.month
+
+    if year_lookup and month_lookup and day_lookup:
+        day = date(int(year_lookup), int(month_lookup), int(day_lookup))
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: year_lookup, month_field: month_lookup}),
+                'title': capfirst(formats.date_format(day, 'YEAR_MONTH_FORMAT')),
+            },
+            'choices': [{'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT'))}],
+        }
+    if year_lookup and month_lookup:
+        start = date(int(year_lookup), int(month_lookup), 1)
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year_lookup}), 'title': str(year_lookup)},
+            'choices': [
+                {
+                    'link': link({year_field: year_lookup, month_field: month_lookup, day_field: day.day}),
+                    'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT')),
+                }
+                for day in buckets('day', start, _next_month(start))
+            ],
+        }
+    if year_lookup:
+        start = date(int(year_lookup), 1, 1)
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [
+                {
+                    'link': link({year_field: year_lookup, month_field: month.month}),
+                    'title': capfirst(formats.date_format(month, 'YEAR_MONTH_FORMAT')),
+                }
+                for month in buckets('month', start, date(start.year + 1, 1, 1))
+            ],
+        }
+    years = buckets('year', date(first.year, 1, 1), date(last.year + 1, 1, 1)) if first else []
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{'link': link({year_field: str(year.year)}), 'title': str(year.year)} for year in years],
+    }
+
+
+# ============================================
+# ФИЛЬТРЫ И МИКСИН
+# ============================================
+def filter_choices_key(filter_class, model, field_path):
+    return f'admin:choices:{filter_class.__name__}:{model._meta.label_lower}:{field_path}'
+
+
+class CachedChoicesMixin:
+    """Варианты фильтра по связи кэшируются на модель и поле."""
+    choices_cache_timeout = FILTER_CHOICES_CACHE_TIMEOUT
+
+    def field_choices(self, field, request, model_admin):
+        key = filter_choices_key(type(self), model_admin.model, self.field_path)
+        choices = cache.get(key)
+        if choices is None:
+            choices = [(pk, str(label)) for pk, label in super().field_choices(field, request, model_admin)]
+            cache.set(key, choices, self.choices_cache_timeout)
+        return choices
+
+
+class CachedRelatedFieldListFilter(CachedChoicesMixin, admin.RelatedFieldListFilter):
+    pass
+
+
+class CachedRelatedOnlyFieldListFilter(CachedChoicesMixin, admin.RelatedOnlyFieldListFilter):
+    pass
+
+
+class FastChangeListMixin:
+    """
+    Для ModelAdmin больших таблиц: без подсчёта всей таблицы, с кэшированным
+    числом строк и кэшированной иерархией дат (см. шаблон
+    admin/pages/change_list.html). Поле date_hierarchy должно быть
+    проиндексировано, иначе проход по корзинам будет сканировать таблицу.
+    """
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    date_hierarchy_cache_timeout = DATE_HIERARCHY_CACHE_TIMEOUT
+
+    def invalidate_filter_choices(self):
+        """Сбрасывает кэш вариантов кэшируемых фильтров из list_filter."""
+        cache.delete_many([
+            filter_choices_key(spec[1], self.model, spec[0])
+            for spec in self.list_filter
+            if isinstance(spec, (list, tuple)) and issubclass(spec[1], CachedChoicesMixin)
+        ])
+
+    # Сброс — после коммита: иначе параллельный запрос успеет закэшировать старые варианты
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(self.invalidate_filter_choices)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(self.invalidate_filter_choices)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(self.invalidate_filter_choices)
@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig
 
 class MainConfig(AppConfig):
+    # В модуле два AppConfig — Django берёт для 'pages' этот
+    default = True
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pages'
+
+    def ready(self):
+        from pages import signals  # noqa: F401
+
+
+class StaticAssetsConfig(StaticFilesConfig):
+    # Не попадают в сборку статики: дубликаты Bulma (шаблоны её не подключают)
+    # и служебные файлы Windows
+    ignore_patterns = StaticFilesConfig.ignore_patterns + [
+        'bulma.css', 'bulma.min.css', 'desktop.ini',
+    ]
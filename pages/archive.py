@@ -0,0 +1,83 @@
+"""
+Горячее/холодное хранение заказов.
+
+Заказы в конечных статусах (Order.TERMINAL_STATUSES), которые не менялись
+дольше N дней, пачками переносятся в ArchivedOrder / ArchivedOrderItem.
+id сохраняются, поэтому ссылки вида order.id в шаблонах остаются валидными.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from pages.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, PromoCodeUsage
+
+
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _copy_fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def archivable_orders(older_than_days=ARCHIVE_AFTER_DAYS):
+    """Заказы, которые можно перенести в архив (идёт по индексу status + updated_at)."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Order.objects.filter(
+        status__in=Order.TERMINAL_STATUSES,
+        updated_at__lt=cutoff,
+    )
+
+
+def archive_batch(order_ids):
+    """Переносит одну пачку заказов с позициями в архив. Возвращает число заказов."""
+    order_fields = _copy_fields(Order)
+    item_fields = _copy_fields(OrderItem)
+
+    with transaction.atomic():
+        orders = list(Order.objects.filter(id__in=order_ids).values(*order_fields))
+        if not orders:
+            return 0
+        ids = [row['id'] for row in orders]
+        items = OrderItem.objects.filter(order_id__in=ids).values(*item_fields)
+
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**row) for row in orders])
+        ArchivedOrderItem.objects.bulk_create([ArchivedOrderItem(**row) for row in items])
+
+        # История промокодов не должна удаляться каскадом вместе с заказом
+        PromoCodeUsage.objects.filter(order_id__in=ids).update(
+            archived_order_id=F('order_id'), order=None
+        )
+
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None):
+    """
+    Переносит все подходящие заказы в архив пачками по batch_size.
+    Каждая пачка — отдельная транзакция, чтобы не держать блокировки долго.
+    """
+    moved = 0
+    batches = 0
+    queryset = archivable_orders(older_than_days).order_by('id')
+    while max_batches is None or batches < max_batches:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        moved += archive_batch(ids)
+        batches += 1
+    return moved
+
+
+def order_history(user):
+    """
+    История заказов пользователя: горячие + архивные, новые сверху.
+    Оба типа отдают одинаковый интерфейс (items, get_status_display, ...).
+    """
+    hot = list(Order.objects.filter(user=user).prefetch_related('items__product'))
+    cold = list(ArchivedOrder.objects.filter(user=user).prefetch_related('items__product'))
+    return sorted(hot + cold, key=lambda order: order.created_at, reverse=True)
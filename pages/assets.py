@@ -0,0 +1,266 @@
+"""
+Сборка и раздача статики без отдельного веб-сервера.
+
+manage.py build_static (collectstatic + отчёт) складывает файлы в STATIC_ROOT:
+
+* CompressedManifestStorage даёт каждому файлу имя с хешем содержимого
+  (css/style.3f2a9c0b1d4e.css) — ссылки в шаблонах через {% static %}
+  и url() в CSS переписываются на них;
+* рядом кладутся .gz и .br (если установлен пакет brotli) для текстовых
+  файлов — сжатие делается один раз при сборке, а не на каждый запрос;
+* дубликаты, которые шаблоны не подключают, в сборку не попадают
+  (StaticAssetsConfig.ignore_patterns в pages/apps.py).
+
+StaticAssetMiddleware отдаёт собранное сам: файл с хешем в имени — с
+Cache-Control immutable на год (повторный визит не делает ни одного
+запроса за статикой), сжатый вариант — по Accept-Encoding, на If-None-Match
+и If-Modified-Since — 304.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.apps import StaticFilesConfig
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from pages.media import IMMUTABLE_CACHE_CONTROL
+
+try:
+    import brotli
+except ImportError:  # без brotli собираются только .gz
+    brotli = None
+
+
+# Уже сжатые форматы: gzip поверх них только тратит время
+COMPRESSED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.ico',
+    '.woff', '.woff2', '.zip', '.gz', '.br', '.mp4', '.webm',
+}
+# Сжатый вариант хранится, только если он меньше оригинала хотя бы на 5%
+MIN_COMPRESSION_GAIN = 0.95
+# Файлы без хеша в имени (ссылки мимо {% static %}) кэшируются ненадолго
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+
+# Суффикс -> значение Content-Encoding, в порядке предпочтения
+ENCODINGS = {'.br': 'br', '.gz': 'gzip'}
+
+
+def compress_file(path):
+    """Пишет path.gz и path.br рядом с файлом; возвращает {суффикс: размер}."""
+    if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return {}
+    with open(path, 'rb') as source:
+        data = source.read()
+    compressors = {'.gz': lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors['.br'] = lambda raw: brotli.compress(raw, quality=11)
+    sizes = {}
+    for suffix, compress in compressors.items():
+        compressed = compress(data)
+        if len(compressed) >= len(data) * MIN_COMPRESSION_GAIN:
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        sizes[suffix] = len(compressed)
+    return sizes
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        collected = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                collected.update((name, hashed_name))
+        if not dry_run:
+            for name in sorted(collected):
+                compress_file(self.path(name))
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def tolerant_converter(matchobj):
+            # vendor.css ссылается на картинки, которых нет в static/ —
+            # битая ссылка остаётся как была, а не валит всю сборку
+            try:
+                return converter(matchobj)
+            except ValueError:
+                return matchobj[0]
+        return tolerant_converter
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # {% static %} на отсутствующий файл: 404 на картинку, а не 500 на страницу
+            return name
+
+
+def _static_prefix():
+    prefix = urlsplit(settings.STATIC_URL).path
+    return prefix if prefix.startswith('/') else '/' + prefix
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    content_type: str
+    size: int
+    mtime: float
+    immutable: bool
+    # Content-Encoding -> (путь, размер)
+    variants: dict = field(default_factory=dict)
+
+    def etag(self, encoding):
+        tag = f'{self.size:x}-{int(self.mtime):x}'
+        return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not re.search(r'q\s*=\s*0(\.0*)?\s*$', params):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def scan_static_root(root, hashed_names):
+    """Индекс STATIC_ROOT: URL -> StaticAsset, с найденными .gz / .br рядом."""
+    prefix = _static_prefix()
+    assets = {}
+    for directory, _, filenames in os.walk(root):
+        names = set(filenames)
+        for filename in filenames:
+            if os.path.splitext(filename)[1] in ENCODINGS:
+                continue
+            path = os.path.join(directory, filename)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            stat = os.stat(path)
+            content_type, _ = mimetypes.guess_type(filename)
+            asset = StaticAsset(
+                path=path,
+                content_type=content_type or 'application/octet-stream',
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                immutable=relative in hashed_names,
+            )
+            for suffix, encoding in ENCODINGS.items():
+                if filename + suffix in names:
+                    asset.variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+            assets[prefix + relative] = asset
+    return assets
+
+
+class StaticAssetMiddleware:
+    """
+    Отдаёт файлы из STATIC_ROOT до остальных middleware. Индекс строится
+    один раз при старте процесса — после build_static процесс перезапускают.
+    Ставится сразу после SecurityMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root = settings.STATIC_ROOT
+        storage = CompressedManifestStorage()
+        if not root or not os.path.exists(storage.path(storage.manifest_name)):
+            # Статика не собрана (разработка): её отдаёт runserver
+            raise MiddlewareNotUsed
+        hashed_names = set(storage.load_manifest()[0].values())
+        self.assets = scan_static_root(root, hashed_names)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            asset = self.assets.get(request.path_info)
+            if asset is not None:
+                return self.serve(request, asset)
+        return self.get_response(request)
+
+    def serve(self, request, asset):
+        accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding = next((coding for coding in asset.variants if coding in accepted), None)
+        path, size = asset.variants[encoding] if encoding else (asset.path, asset.size)
+
+        headers = {
+            'ETag': asset.etag(encoding),
+            'Last-Modified': http_date(asset.mtime),
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if asset.immutable else MUTABLE_CACHE_CONTROL,
+        }
+        if asset.variants:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            not_modified = if_none_match.strip() == '*' or headers['ETag'] in if_none_match
+        else:
+            not_modified = not was_modified_since(request.headers.get('If-Modified-Since'), asset.mtime)
+        if not_modified:
+            return HttpResponseNotModified(headers=headers)
+
+        headers['Content-Length'] = str(size)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        if request.method == 'HEAD':
+            return HttpResponse(content_type=asset.content_type, headers=headers)
+        return FileResponse(open(path, 'rb'), content_type=asset.content_type, headers=headers)
+
+
+def _size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def source_files(ignore_patterns):
+    """Что нашли бы finders collectstatic: имя в STATIC_ROOT -> путь исходника."""
+    files = {}
+    for finder in finders.get_finders():
+        for name, storage in finder.list(ignore_patterns):
+            prefix = getattr(storage, 'prefix', None)
+            files.setdefault(f'{prefix}/{name}' if prefix else name, storage.path(name))
+    return files
+
+
+def _is_text(name):
+    return os.path.splitext(name)[1].lower() not in COMPRESSED_EXTENSIONS
+
+
+def build_report(root, hashed_names):
+    """
+    Байты до и после сборки. «До» — обычный collectstatic: все файлы как
+    есть, без сжатия; «после» — файлы с хешем, без исключённых дубликатов,
+    CSS/JS/SVG — тем вариантом, что уйдёт по сети (.br, иначе .gz).
+    """
+    before = source_files(StaticFilesConfig.ignore_patterns)
+    kept = source_files(apps.get_app_config('staticfiles').ignore_patterns)
+    report = {
+        'before_files': len(before),
+        'before_bytes': sum(map(_size, before.values())),
+        'before_text_bytes': sum(_size(path) for name, path in before.items() if _is_text(name)),
+        'stripped': sorted(before.keys() - kept.keys()),
+        'stripped_bytes': sum(_size(before[name]) for name in before.keys() - kept.keys()),
+        'after_files': len(hashed_names),
+        'after_bytes': 0,
+        'after_text_bytes': 0,
+        'after_text_gzip_bytes': 0,
+        'after_text_brotli_bytes': 0,
+    }
+    for name in hashed_names:
+        path = os.path.join(root, name)
+        size = _size(path)
+        report['after_bytes'] += size
+        if _is_text(name):
+            report['after_text_bytes'] += size
+            report['after_text_gzip_bytes'] += _size(path + '.gz') or size
+            report['after_text_brotli_bytes'] += _size(path + '.br') or _size(path + '.gz') or size
+    return report
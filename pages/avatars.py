@@ -0,0 +1,148 @@
+"""
+Аватары: нормализация загрузки, маленькие рендиции и кэш URL.
+
+Загрузка через форму профиля сразу обрезается по центру до квадрата и
+пересохраняется в WebP не больше AVATAR_SOURCE_SIZE — снимок с телефона
+на 5 МБ в хранилище не попадает. Рендиции (квадратные WebP по
+AVATAR_SIZES) строит воркер очереди после сохранения профиля:
+
+    {"source": "blobs/ab/cd/...webp",
+     "files": ["renditions/avatar/7/3f2a9c0b1d4e-small.webp", ...],
+     "sizes": {"small": "/media/...", "medium": "/media/...", "large": "/media/..."}}
+
+Шапка сайта берёт URL из кэша по user_id (avatar_urls, контекстный
+процессор pages.context_processors.header_avatar) — без запроса к
+Profile. Кэш сбрасывается сигналом при сохранении или удалении профиля
+(редактирование профиля, админка) и после сборки рендиций.
+"""
+import io
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from pages.images import RENDITIONS_PREFIX, delete_renditions
+from pages.taskqueue import task
+
+
+# Сторона нормализованного оригинала — хватает на самую крупную рендицию при 2x
+AVATAR_SOURCE_SIZE = 512
+# Имя -> сторона квадрата: small — шапка (56 px), medium — она же на 2x и форма профиля
+AVATAR_SIZES = {
+    'small': 64,
+    'medium': 128,
+    'large': 256,
+}
+AVATAR_QUALITY = 80
+
+AVATAR_CACHE_KEY = 'avatar-urls:{}'
+AVATAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _square(data, side):
+    image = Image.open(io.BytesIO(data))
+    image.draft('RGB', (side, side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    side = min(side, *image.size)
+    return ImageOps.fit(image, (side, side), Image.LANCZOS)
+
+
+def _webp(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='WEBP', quality=AVATAR_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def normalize_avatar(uploaded_file):
+    """Загруженный файл -> квадратный WebP не больше AVATAR_SOURCE_SIZE (ContentFile)."""
+    try:
+        image = _square(uploaded_file.read(), AVATAR_SOURCE_SIZE)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось прочитать изображение', code='invalid_image')
+    return ContentFile(_webp(image), name='avatar.webp')
+
+
+def build_avatar_renditions(profile):
+    if not profile.avatar:
+        return {}
+    profile.avatar.open('rb')
+    try:
+        data = profile.avatar.read()
+    finally:
+        profile.avatar.close()
+    image = _square(data, max(AVATAR_SIZES.values()))
+    # Имя блоба — хеш содержимого: его начало отличает файлы разных версий аватара
+    digest = profile.avatar.name.rsplit('/', 1)[-1][:12]
+    folder = f'{RENDITIONS_PREFIX}avatar/{profile.pk}/'
+    files = []
+    sizes = {}
+    for name, side in sorted(AVATAR_SIZES.items(), key=lambda item: -item[1]):
+        if image.width > side:
+            image = image.resize((side, side), Image.LANCZOS, reducing_gap=3.0)
+        path = default_storage.save(f'{folder}{digest}-{name}.webp', ContentFile(_webp(image)))
+        files.append(path)
+        sizes[name] = default_storage.url(path)
+    return {'source': profile.avatar.name, 'files': files, 'sizes': sizes}
+
+
+def needs_avatar_renditions(profile):
+    source = profile.avatar.name if profile.avatar else None
+    return (profile.avatar_renditions or {}).get('source') != source
+
+
+def refresh_avatar(profile):
+    """Пересобирает рендиции без save() — сигналы не срабатывают повторно."""
+    old = profile.avatar_renditions
+    try:
+        profile.avatar_renditions = build_avatar_renditions(profile)
+    except OSError as exc:
+        # Шапка покажет оригинал; source не даёт пересобирать битый файл
+        profile.avatar_renditions = {'source': profile.avatar.name, 'error': str(exc)}
+    type(profile).objects.filter(pk=profile.pk).update(avatar_renditions=profile.avatar_renditions)
+    delete_renditions(old)
+    invalidate_avatar(profile.user_id)
+    return profile.avatar_renditions
+
+
+@task(max_attempts=3)
+def refresh_avatar_task(pk):
+    profile = apps.get_model('pages.profile').objects.filter(pk=pk).first()
+    if profile is not None and needs_avatar_renditions(profile):
+        refresh_avatar(profile)
+
+
+def _urls(avatar_name, renditions):
+    if not avatar_name:
+        return {}
+    renditions = renditions or {}
+    if renditions.get('source') == avatar_name and renditions.get('sizes'):
+        return dict(renditions['sizes'])
+    # Рендиции ещё не собраны — пока отдаём сам (уже нормализованный) файл
+    url = apps.get_model('pages.profile')._meta.get_field('avatar').storage.url(avatar_name)
+    return dict.fromkeys(AVATAR_SIZES, url)
+
+
+def avatar_urls(user_id):
+    """{'small': url, 'medium': url, 'large': url} или {} без аватара — из кэша."""
+    key = AVATAR_CACHE_KEY.format(user_id)
+    urls = cache.get(key)
+    if urls is None:
+        row = (
+            apps.get_model('pages.profile').objects
+            .filter(user_id=user_id).values_list('avatar', 'avatar_renditions').first()
+        )
+        urls = _urls(*row) if row else {}
+        cache.set(key, urls, AVATAR_CACHE_TIMEOUT)
+    return urls
+
+
+def invalidate_avatar(user_id):
+    key = AVATAR_CACHE_KEY.format(user_id)
+    # После коммита: иначе параллельный запрос успеет закэшировать старый URL
+    transaction.on_commit(lambda: cache.delete(key))
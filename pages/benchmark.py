@@ -0,0 +1,37 @@
+"""
+Общие помощники для команд bench_* (замеры на синтетических данных).
+"""
+import statistics
+import time
+
+from django.db import transaction
+
+
+class Rollback(Exception):
+    """Бросается в конце замера, чтобы откатить синтетические данные."""
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Возвращает (медиана, p95) времени выполнения fn в миллисекундах."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95
+
+
+def run_in_rollback(fn):
+    """Выполняет fn в транзакции и откатывает её — база остаётся нетронутой."""
+    result = None
+    try:
+        with transaction.atomic():
+            result = fn()
+            raise Rollback
+    except Rollback:
+        pass
+    return result
@@ -0,0 +1,199 @@
+"""
+Учёт ссылок на файлы хранилища по хешу (pages/storage.py).
+
+Сигналы (pages/signals.py) при сохранении и удалении Product, Category и
+Profile меняют MediaBlob.refcount старого и нового файла в той же
+транзакции. bulk_create и update() сигналов не шлют, поэтому сборщик
+(gc_media_blobs) сначала пересчитывает ссылки по самим таблицам и только
+потом удаляет файлы без ссылок, которые не трогали дольше GC_GRACE: так
+переживают загрузки, чья транзакция ещё не закоммичена, и повторная
+загрузка уже существующего файла (storage.save обновляет его mtime).
+"""
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from pages.models import Category, MediaBlob, Product, Profile
+from pages.storage import blob_storage
+
+
+# (модель, поле) — всё, что хранится в blob_storage
+MEDIA_FIELDS = (
+    (Product, 'image'),
+    (Category, 'image'),
+    (Profile, 'avatar'),
+)
+
+GC_GRACE = timedelta(hours=1)
+
+
+def _fields(model):
+    return [field for media_model, field in MEDIA_FIELDS if media_model is model]
+
+
+def _names(instance, fields):
+    return {field: getattr(instance, field).name or '' for field in fields}
+
+
+def remember_files(sender, instance, update_fields=None):
+    """pre_save: запоминает, на какие файлы запись ссылалась до сохранения."""
+    fields = _fields(sender)
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    if instance._state.adding or instance.pk is None:
+        instance._media_before = dict.fromkeys(fields, '')
+    elif fields:
+        row = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+        instance._media_before = {field: row.get(field) or '' for field in fields}
+    else:
+        instance._media_before = {}
+
+
+def adjust_refcount(name, delta):
+    storage = blob_storage()
+    if not storage.is_blob(name):
+        return
+    # update() не трогает auto_now — updated_at выставляется явно
+    changes = {'refcount': F('refcount') + delta, 'updated_at': timezone.now()}
+    if MediaBlob.objects.filter(path=name).update(**changes):
+        return
+    if delta > 0:
+        # Первая ссылка на файл: строки ещё нет
+        size = storage.size(name) if storage.exists(name) else 0
+        MediaBlob.objects.get_or_create(path=name, defaults={'size': size})
+        MediaBlob.objects.filter(path=name).update(**changes)
+
+
+def files_saved(sender, instance):
+    """post_save: +1 новому файлу, -1 старому."""
+    before = getattr(instance, '_media_before', {})
+    for field, old_name in before.items():
+        new_name = getattr(instance, field).name or ''
+        if new_name != old_name:
+            adjust_refcount(new_name, 1)
+            adjust_refcount(old_name, -1)
+    instance._media_before = _names(instance, before)
+
+
+def files_released(sender, instance):
+    """post_delete: запись больше не ссылается на свои файлы."""
+    for name in _names(instance, _fields(sender)).values():
+        adjust_refcount(name, -1)
+
+
+def recount_blobs():
+    """Пересчитывает refcount по таблицам; возвращает число исправленных строк."""
+    storage = blob_storage()
+    counts = Counter()
+    for model, field in MEDIA_FIELDS:
+        rows = (
+            model.objects.filter(**{f'{field}__startswith': storage.prefix})
+            .order_by().values(field).annotate(references=Count('pk'))
+        )
+        for row in rows:
+            counts[row[field]] += row['references']
+
+    now = timezone.now()
+    blobs = MediaBlob.objects.in_bulk(field_name='path')
+    MediaBlob.objects.bulk_create([
+        MediaBlob(path=path, refcount=references, size=storage.size(path) if storage.exists(path) else 0)
+        for path, references in counts.items() if path not in blobs
+    ], ignore_conflicts=True)
+    changed = []
+    for path, blob in blobs.items():
+        if blob.refcount != counts.get(path, 0):
+            blob.refcount = counts.get(path, 0)
+            blob.updated_at = now
+            changed.append(blob)
+    MediaBlob.objects.bulk_update(changed, ['refcount', 'updated_at'], batch_size=1000)
+    return len(changed) + len(counts.keys() - blobs.keys())
+
+
+def _untouched_since(storage, path, cutoff):
+    try:
+        return os.path.getmtime(storage.path(path)) < cutoff
+    except FileNotFoundError:
+        return True
+
+
+def collect_garbage(grace=GC_GRACE):
+    """
+    Удаляет файлы без ссылок: строки MediaBlob с refcount 0 и файлы в blobs/
+    без строки вовсе (загрузка, чья транзакция откатилась).
+    Возвращает (удалено файлов, освобождено байт).
+    """
+    storage = blob_storage()
+    recount_blobs()
+    cutoff = timezone.now() - grace
+    file_cutoff = time.time() - grace.total_seconds()
+    deleted = freed = 0
+
+    for blob in MediaBlob.objects.filter(refcount__lte=0, updated_at__lt=cutoff).iterator():
+        if not _untouched_since(storage, blob.path, file_cutoff):
+            continue
+        # Условие ещё раз при удалении: на файл могли сослаться после пересчёта
+        if MediaBlob.objects.filter(pk=blob.pk, refcount__lte=0).delete()[0]:
+            storage.delete(blob.path)
+            deleted += 1
+            freed += blob.size
+
+    known = set(MediaBlob.objects.values_list('path', flat=True))
+    root = storage.path(storage.prefix)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.relpath(os.path.join(directory, filename), storage.location).replace(os.sep, '/')
+            if path in known or not _untouched_since(storage, path, file_cutoff):
+                continue
+            freed += storage.size(path)
+            storage.delete(path)
+            deleted += 1
+    return deleted, freed
+
+
+def migrate_legacy_files(delete_legacy=True, progress=None):
+    """
+    Переносит старые файлы (products/x_AbCdEf.jpg ...) в blobs/: одинаковые
+    по содержимому сливаются в один. Рендиции не пересобираются — у них
+    только обновляется source. Возвращает (строк перенесено, старых файлов
+    удалено, байт до, байт после).
+    """
+    storage = blob_storage()
+    legacy = {}
+    moved = 0
+    for model, field in MEDIA_FIELDS:
+        rows = (
+            model.objects.exclude(**{f'{field}__startswith': storage.prefix})
+            .exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            .order_by('pk')
+        )
+        has_renditions = any(f.name == 'renditions' for f in model._meta.get_fields())
+        for instance in rows.iterator(chunk_size=200):
+            name = getattr(instance, field).name
+            if not storage.exists(name):
+                continue
+            with storage.open(name) as source:
+                blob_name = storage.save(name, source)
+            values = {field: blob_name}
+            if has_renditions and (instance.renditions or {}).get('source') == name:
+                values['renditions'] = dict(instance.renditions, source=blob_name)
+            model.objects.filter(pk=instance.pk).update(**values)
+            legacy[name] = blob_name
+            moved += 1
+            if progress and moved % 100 == 0:
+                progress(moved)
+
+    recount_blobs()
+    bytes_before = sum(storage.size(name) for name in legacy)
+    bytes_after = sum(storage.size(blob) for blob in set(legacy.values()))
+    removed = 0
+    if delete_legacy:
+        for name in legacy:
+            still_used = any(model.objects.filter(**{field: name}).exists() for model, field in MEDIA_FIELDS)
+            if not still_used:
+                storage.delete(name)
+                removed += 1
+    return moved, removed, bytes_before, bytes_after
@@ -0,0 +1,53 @@
+"""
+Массовые операции с каталогом (действия админки над товарами).
+
+Выборка обрабатывается кусками по первичному ключу: на кусок — один
+UPDATE ... WHERE id IN (...) в своей транзакции, без загрузки и save()
+каждого товара. Блокировки остаются короткими даже на десятках тысяч строк.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Round
+from django.utils import timezone
+
+
+BULK_CHUNK_SIZE = 2000
+
+
+def update_in_chunks(queryset, values, chunk_size=BULK_CHUNK_SIZE, progress=None):
+    """
+    queryset.update(**values) кусками по chunk_size строк.
+    progress(done, total) вызывается после каждого куска. Возвращает число строк.
+    """
+    # Ключи забираем заранее: на SQLite нельзя писать в таблицу, пока её читает курсор
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    manager = queryset.model._default_manager
+    done = 0
+    for start in range(0, len(pks), chunk_size):
+        with transaction.atomic():
+            done += manager.filter(pk__in=pks[start:start + chunk_size]).update(**values)
+        if progress:
+            progress(done, len(pks))
+    return done
+
+
+def change_prices(queryset, percent, chunk_size=BULK_CHUNK_SIZE, progress=None):
+    """Меняет цены на percent процентов (отрицательный — скидка), с округлением до центов."""
+    factor = 1 + Decimal(percent) / 100
+    return update_in_chunks(
+        queryset,
+        {'price': Round(F('price') * factor, 2), 'updated_at': timezone.now()},
+        chunk_size,
+        progress,
+    )
+
+
+def move_to_category(queryset, category, chunk_size=BULK_CHUNK_SIZE, progress=None):
+    return update_in_chunks(
+        queryset,
+        {'category': category, 'updated_at': timezone.now()},
+        chunk_size,
+        progress,
+    )
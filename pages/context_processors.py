@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from pages.avatars import avatar_urls
+
+
+def header_avatar(request):
+    """
+    header_avatar — URL аватара текущего пользователя по размерам
+    ({{ header_avatar.small }}). Берётся из кэша и только если шаблон
+    к нему обратился.
+    """
+    def urls():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return {}
+        return avatar_urls(user.pk)
+    return {'header_avatar': SimpleLazyObject(urls)}
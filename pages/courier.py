@@ -0,0 +1,130 @@
+"""
+Массовая смена статусов заказов (курьерский API и действия в админке).
+
+Вместо Order.save() на каждый заказ: один SELECT текущих статусов,
+затем по одному UPDATE на каждый целевой статус.
+Здесь же — возврат на склад заказов с истёкшим сроком хранения.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from pages.models import Order
+
+
+# Ограничение на размер IN (...) — SQLite не любит слишком много параметров
+CHUNK_SIZE = 500
+MAX_UPDATES_PER_REQUEST = 1000
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _allowed_sources(new_status):
+    return [old for old, targets in Order.ALLOWED_TRANSITIONS.items() if new_status in targets]
+
+
+def apply_status_updates(updates, now=None):
+    """
+    Применяет пачку обновлений [(order_number, new_status), ...].
+
+    Возвращает {'updated': [order_number, ...], 'errors': [{'order_number', 'error'}, ...]}.
+    Для доставленных заказов storage_deadline выставляется тем же UPDATE.
+    """
+    now = now or timezone.now()
+    valid_statuses = dict(Order.STATUS_CHOICES)
+
+    # Повторы одного заказа в пачке — побеждает последний
+    requested = {}
+    for order_number, new_status in updates:
+        requested[str(order_number).strip()] = new_status
+
+    errors = []
+    current = {}
+    numbers = list(requested)
+    for chunk in _chunks(numbers):
+        current.update(
+            Order.objects.filter(order_number__in=chunk).values_list('order_number', 'status')
+        )
+
+    by_target = {}
+    for order_number, new_status in requested.items():
+        if not isinstance(new_status, str):
+            # Из JSON может прийти список или объект — они не хешируются для проверки ниже
+            errors.append({'order_number': order_number, 'error': 'Статус должен быть строкой'})
+        elif new_status not in valid_statuses:
+            errors.append({'order_number': order_number, 'error': f'Неизвестный статус: {new_status}'})
+        elif order_number not in current:
+            errors.append({'order_number': order_number, 'error': 'Заказ не найден'})
+        elif new_status not in Order.ALLOWED_TRANSITIONS.get(current[order_number], ()):
+            errors.append({
+                'order_number': order_number,
+                'error': f'Недопустимый переход: {current[order_number]} → {new_status}',
+            })
+        else:
+            by_target.setdefault(new_status, []).append(order_number)
+
+    with transaction.atomic():
+        for new_status, order_numbers in by_target.items():
+            fields = {'status': new_status, 'updated_at': now}
+            if new_status == 'delivered':
+                fields['storage_deadline'] = Coalesce(
+                    'storage_deadline', Value(now + timedelta(days=Order.STORAGE_DAYS))
+                )
+            # Фильтр по исходному статусу защищает от гонки с параллельным изменением
+            for chunk in _chunks(order_numbers):
+                Order.objects.filter(
+                    order_number__in=chunk,
+                    status__in=_allowed_sources(new_status),
+                ).update(**fields)
+
+    # Проверяем, что всё применилось (кто-то мог изменить заказ между SELECT и UPDATE)
+    accepted = [number for numbers in by_target.values() for number in numbers]
+    final = {}
+    for chunk in _chunks(accepted):
+        final.update(Order.objects.filter(order_number__in=chunk).values_list('order_number', 'status'))
+
+    updated = []
+    for order_number in accepted:
+        if final.get(order_number) == requested[order_number]:
+            updated.append(order_number)
+        else:
+            errors.append({'order_number': order_number, 'error': 'Статус изменён параллельно, повторите'})
+
+    return {'updated': updated, 'errors': errors}
+
+
+EXPIRY_BATCH_SIZE = 500
+EXPIRY_MAX_BATCHES = 20
+
+
+def expire_storage_deadlines(batch_size=EXPIRY_BATCH_SIZE, max_batches=EXPIRY_MAX_BATCHES, now=None):
+    """
+    Возвращает на склад доставленные заказы, у которых истёк срок хранения.
+
+    Выборка идёт по индексу (status, storage_deadline), пачками по batch_size,
+    и ограничена max_batches за запуск — остаток подберёт следующий запуск.
+    Возвращает (обработано, пачек, осталось ли ещё).
+    """
+    now = now or timezone.now()
+    expired = Order.objects.filter(
+        status='delivered',
+        storage_deadline__lt=now,
+    ).order_by('storage_deadline')
+
+    processed = 0
+    batches = 0
+    while batches < max_batches:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return processed, batches, False
+        processed += Order.objects.filter(id__in=ids, status='delivered').update(
+            status='returned', updated_at=now
+        )
+        batches += 1
+    return processed, batches, expired.exists()
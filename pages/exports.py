@@ -0,0 +1,143 @@
+"""
+Потоковая выгрузка заказов для бухгалтерии (CSV / JSONL).
+
+Строки читаются через values_list(...).iterator(chunk_size=...): курсор
+отдаёт их кусками, модели не создаются, вся таблица в памяти не
+собирается. Генераторы ниже склеивают строки в блоки и годятся и для
+StreamingHttpResponse, и для записи в файл из manage.py export_orders.
+
+Завершённые заказы старше N дней лежат в архивных таблицах (pages/archive.py) —
+это и есть закрытые продажи, поэтому выгрузка продолжается строками
+ArchivedOrder / ArchivedOrderItem с теми же фильтрами и колонками
+(пути в ORM у обеих пар таблиц одинаковые, как и в pages/sales.py).
+"""
+import csv
+import io
+import json
+from datetime import datetime, time
+from itertools import chain
+
+from django.utils import timezone
+
+from pages.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+
+EXPORT_CHUNK_SIZE = 2000
+# Сколько строк склеивать в один кусок ответа
+EXPORT_BLOCK_ROWS = 500
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Колонка выгрузки -> путь в ORM
+ORDER_COLUMNS = (
+    ('order_number', 'order_number'),
+    ('created_at', 'created_at'),
+    ('status', 'status'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('total_amount', 'total_amount'),
+    ('delivery_cost', 'delivery_cost'),
+    ('discount_amount', 'discount_amount'),
+    ('promo_code', 'promo_code__code'),
+    ('delivery_city', 'delivery_city'),
+    ('pickup_point', 'pickup_point'),
+)
+
+ITEM_COLUMNS = (
+    ('order_number', 'order__order_number'),
+    ('created_at', 'order__created_at'),
+    ('status', 'order__status'),
+    ('product_id', 'product_id'),
+    ('product', 'product__name'),
+    ('quantity', 'quantity'),
+    ('price', 'price'),
+)
+
+EXPORT_KINDS = {
+    'orders': ORDER_COLUMNS,
+    'items': ITEM_COLUMNS,
+}
+
+# Модель заказа -> модель его позиций
+ITEM_MODELS = {
+    Order: OrderItem,
+    ArchivedOrder: ArchivedOrderItem,
+}
+
+
+def filter_orders(queryset=None, date_from=None, date_to=None, statuses=None, model=Order):
+    """
+    Заказы за период [date_from, date_to] (даты включительно) с нужными
+    статусами; model=ArchivedOrder — то же по архиву.
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    if date_from:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        queryset = queryset.filter(created_at__lte=timezone.make_aware(datetime.combine(date_to, time.max)))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def _rows(orders, kind, chunk_size):
+    columns = EXPORT_KINDS[kind]
+    if kind == 'items':
+        # Подзапрос, а не список id: выборка заказов может быть любого размера
+        queryset = ITEM_MODELS[orders.model].objects.filter(order__in=orders.values('pk')).order_by('order_id', 'pk')
+    else:
+        queryset = orders.order_by('pk')
+    return queryset.values_list(*(path for _, path in columns)).iterator(chunk_size=chunk_size)
+
+
+def export_rows(orders, kind='orders', chunk_size=EXPORT_CHUNK_SIZE, archived=None):
+    """
+    (заголовок, итератор кортежей) для заказов или их позиций: сначала
+    orders, затем archived — выборка ArchivedOrder (id у архива те же, не пересекаются).
+    """
+    rows = _rows(orders, kind, chunk_size)
+    if archived is not None:
+        rows = chain(rows, _rows(archived, kind, chunk_size))
+    return [name for name, _ in EXPORT_KINDS[kind]], rows
+
+
+def _blocks(lines):
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= EXPORT_BLOCK_ROWS:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def _csv_lines(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def _jsonl_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str) + '\n'
+
+
+def stream_export(orders, kind='orders', fmt='csv', chunk_size=EXPORT_CHUNK_SIZE, archived=None):
+    """Генератор кусков текста выгрузки."""
+    header, rows = export_rows(orders, kind, chunk_size, archived)
+    lines = _csv_lines(header, rows) if fmt == 'csv' else _jsonl_lines(header, rows)
+    return _blocks(lines)
+
+
+def export_filename(kind, fmt):
+    return f'{kind}-{timezone.localdate():%Y%m%d}.{fmt}'
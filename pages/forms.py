@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import UploadedFile
 
+from pages.avatars import normalize_avatar
 from pages.models import Profile, Product
 
 
@@ -48,6 +50,13 @@ class ProfileEditForm(forms.ModelForm):
             }),
         }
 
+    def clean_avatar(self):
+        avatar = self.cleaned_data.get('avatar')
+        # Новая загрузка — квадратный WebP вместо исходника; прежний файл и очистку не трогаем
+        if isinstance(avatar, UploadedFile):
+            return normalize_avatar(avatar)
+        return avatar
+
 
 
 
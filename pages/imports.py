@@ -0,0 +1,276 @@
+"""
+Импорт каталога поставщика (CSV / JSONL) с upsert по артикулу.
+
+Колонки: sku (обязательна), name, price, description, category — слаг
+категории (отсутствующие создаются), category_name, unit_type, image — имя
+файла в локальном каталоге картинок.
+
+Строки обрабатываются пачками по batch_size, каждая пачка — одна
+транзакция: один запрос на поиск существующих товаров по sku, затем
+bulk_create новых и bulk_update изменённых. bulk_update в Django дорог
+(CASE WHEN на каждое поле), поэтому неизменившиеся товары пропускаются,
+а изменённые группируются по набору реально изменившихся полей.
+Категории читаются один раз и дальше живут в словаре slug -> id.
+Рендиции новых картинок ставятся в очередь задач той же транзакцией.
+Картинки сохраняются в хранилище по хешу (pages/storage.py): повторный
+импорт того же файла даёт то же имя, и товар не считается изменённым.
+"""
+import csv
+import io
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from pages.images import refresh_renditions_task
+from pages.models import Category, Product
+from pages.taskqueue import enqueue_many
+
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'jsonl')
+# Больше ошибок не копим — хватит, чтобы понять, что с файлом не так
+MAX_REPORTED_ERRORS = 100
+
+# Поля, которые импорт перезаписывает у существующих товаров
+IMPORT_FIELDS = ('name', 'description', 'price', 'category_id', 'unit_type', 'image')
+UNIT_TYPES = {value for value, _ in Product.UNIT_CHOICES}
+# Граница DecimalField цены: max_digits=10, decimal_places=2 -> меньше 10^8
+_price_field = Product._meta.get_field('price')
+PRICE_LIMIT = Decimal(10) ** (_price_field.max_digits - _price_field.decimal_places)
+# На PostgreSQL слишком длинное значение — DataError на всю пачку, а не пропуск строки
+SKU_MAX_LENGTH = Product._meta.get_field('sku').max_length
+CATEGORY_SLUG_MAX_LENGTH = Category._meta.get_field('slug').max_length
+CATEGORY_NAME_MAX_LENGTH = Category._meta.get_field('name').max_length
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class ImportFileError(ValueError):
+    """Файл не дочитан до конца; result — то, что успели применить прошлые пачки."""
+
+    def __init__(self, message, result):
+        super().__init__(message)
+        self.result = result
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    categories_created: int = 0
+    batches: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return 'jsonl' if extension in ('jsonl', 'ndjson', 'json') else 'csv'
+
+
+def read_rows(stream, fmt='csv'):
+    """Итератор (номер строки, dict) по текстовому потоку."""
+    if fmt == 'jsonl':
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, exc
+    else:
+        # Строка 1 — заголовок
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+
+
+def open_upload(uploaded_file):
+    """Текстовый поток из загруженного файла; utf-8-sig съедает BOM из Excel."""
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+
+def _clean(value):
+    return str(value).strip() if value is not None else ''
+
+
+def parse_row(row):
+    """Проверяет строку фида и приводит значения к типам модели."""
+    if isinstance(row, Exception):
+        raise ImportRowError(f'не JSON: {row}')
+    if not isinstance(row, dict):
+        raise ImportRowError(f'ожидался объект JSON, получено {type(row).__name__}')
+    sku = _clean(row.get('sku'))
+    if not sku:
+        raise ImportRowError('пустой sku')
+    if len(sku) > SKU_MAX_LENGTH:
+        raise ImportRowError(f'sku длиннее {SKU_MAX_LENGTH} символов')
+    name = _clean(row.get('name'))
+    if not name:
+        raise ImportRowError('пустое название')
+    try:
+        price = Decimal(_clean(row.get('price')).replace(',', '.'))
+    except InvalidOperation:
+        raise ImportRowError(f'неверная цена {row.get("price")!r}')
+    # Decimal принимает NaN и Infinity — сравнение и quantize на них падают
+    if not price.is_finite():
+        raise ImportRowError(f'неверная цена {row.get("price")!r}')
+    if price < 0:
+        raise ImportRowError('отрицательная цена')
+    # Сначала без quantize: на числах вроде 1e30 он сам бросает InvalidOperation
+    if price >= PRICE_LIMIT or price.quantize(Decimal('0.01')) >= PRICE_LIMIT:
+        raise ImportRowError(f'цена больше {PRICE_LIMIT - Decimal("0.01")}')
+    unit_type = _clean(row.get('unit_type')) or 'pcs'
+    if unit_type not in UNIT_TYPES:
+        raise ImportRowError(f'неизвестная единица {unit_type!r}')
+    category_name = _clean(row.get('category_name'))
+    category_slug = slugify(_clean(row.get('category')) or category_name)
+    if len(category_slug) > CATEGORY_SLUG_MAX_LENGTH:
+        raise ImportRowError(f'слаг категории длиннее {CATEGORY_SLUG_MAX_LENGTH} символов')
+    if len(category_name) > CATEGORY_NAME_MAX_LENGTH:
+        raise ImportRowError(f'название категории длиннее {CATEGORY_NAME_MAX_LENGTH} символов')
+    return {
+        'sku': sku,
+        'name': name[:200],
+        'description': _clean(row.get('description')) or 'No description',
+        'price': price.quantize(Decimal('0.01')),
+        'unit_type': unit_type,
+        'category_slug': category_slug,
+        'category_name': category_name or category_slug,
+        'image': _clean(row.get('image')),
+    }
+
+
+class CatalogImporter:
+    def __init__(self, images_dir=None, batch_size=IMPORT_BATCH_SIZE):
+        self.images_dir = images_dir
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self.categories = dict(Category.objects.values_list('slug', 'pk'))
+        # Имя файла -> имя в хранилище: каждый файл хешируется один раз за импорт
+        self.images = {}
+
+    def run(self, rows, progress=None):
+        rows = iter(rows)
+        while True:
+            try:
+                batch = list(islice(rows, self.batch_size))
+            except UnicodeDecodeError as exc:
+                # Поток декодируется по ходу чтения: прошлые пачки уже в базе, текущая — нет
+                raise ImportFileError(
+                    f'файл не в UTF-8 ({exc.reason}, байт {exc.start}); '
+                    f'уже применено пачек: {self.result.batches}', self.result,
+                ) from exc
+            if not batch:
+                break
+            with transaction.atomic():
+                self._import_batch(batch)
+            self.result.batches += 1
+            if progress:
+                progress(self.result)
+        return self.result
+
+    def _import_batch(self, batch):
+        parsed = {}
+        for line_no, row in batch:
+            try:
+                data = parse_row(row)
+            except ImportRowError as exc:
+                self.result.add_error(line_no, str(exc))
+                continue
+            # Повтор sku в пачке — побеждает последняя строка
+            parsed[data['sku']] = (line_no, data)
+
+        self._ensure_categories(data for _, data in parsed.values())
+        existing = Product.objects.filter(sku__in=parsed.keys()).in_bulk(field_name='sku')
+        now = timezone.now()
+        to_create = []
+        to_update = defaultdict(list)
+        for sku, (line_no, data) in parsed.items():
+            values = {
+                'name': data['name'],
+                'description': data['description'],
+                'price': data['price'],
+                'category_id': self.categories.get(data['category_slug']),
+                'unit_type': data['unit_type'],
+            }
+            if data['image']:
+                try:
+                    values['image'] = self._store_image(data['image'])
+                except ImportRowError as exc:
+                    self.result.add_error(line_no, str(exc))
+                    continue
+
+            product = existing.get(sku)
+            if product is None:
+                to_create.append(Product(sku=sku, updated_at=now, **values))
+                continue
+            changed = tuple(name for name in IMPORT_FIELDS if name in values and getattr(product, name) != values[name])
+            if not changed:
+                self.result.unchanged += 1
+                continue
+            for name in changed:
+                setattr(product, name, values[name])
+            product.updated_at = now
+            to_update[changed].append(product)
+
+        Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+        with_new_image = [product.pk for product in to_create if product.image]
+        for changed, products in to_update.items():
+            # bulk_update не трогает auto_now — updated_at выставлен вручную выше
+            fields = [name.removesuffix('_id') for name in changed] + ['updated_at']
+            Product.objects.bulk_update(products, fields, batch_size=self.batch_size)
+            self.result.updated += len(products)
+            if 'image' in changed:
+                with_new_image.extend(product.pk for product in products if product.image)
+        self.result.created += len(to_create)
+        # bulk_create / bulk_update не шлют сигналов — рендиции ставим в очередь сами
+        enqueue_many(refresh_renditions_task, [('pages.product', pk) for pk in with_new_image])
+
+    def _ensure_categories(self, rows):
+        missing = {}
+        for data in rows:
+            slug = data['category_slug']
+            if slug and slug not in self.categories:
+                missing.setdefault(slug, data['category_name'])
+        if not missing:
+            return
+        Category.objects.bulk_create(
+            [Category(slug=slug, name=name) for slug, name in missing.items()], ignore_conflicts=True
+        )
+        created = dict(Category.objects.filter(slug__in=missing).values_list('slug', 'pk'))
+        self.categories.update(created)
+        self.result.categories_created += len(created)
+
+    def _store_image(self, filename):
+        """Сохраняет картинку в хранилище по хешу; одинаковые файлы — один blob."""
+        if not self.images_dir:
+            raise ImportRowError('не задан каталог картинок')
+        basename = os.path.basename(filename)
+        if basename not in self.images:
+            path = os.path.join(self.images_dir, basename)
+            if not os.path.isfile(path):
+                raise ImportRowError(f'нет файла {basename}')
+            storage = Product._meta.get_field('image').storage
+            with open(path, 'rb') as source:
+                self.images[basename] = storage.save(basename, File(source))
+        return self.images[basename]
+
+
+def import_products(stream, fmt='csv', images_dir=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    return CatalogImporter(images_dir, batch_size).run(read_rows(stream, fmt), progress)
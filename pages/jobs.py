@@ -0,0 +1,32 @@
+"""
+Учёт запусков периодических задач (management-команды из cron / systemd timer).
+"""
+import time
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from pages.models import JobRun
+
+
+@contextmanager
+def job_run(name):
+    """
+    Пишет в JobRun начало, окончание, длительность и результат задачи.
+
+        with job_run('expire_storage') as run:
+            run.processed = do_work()
+    """
+    run = JobRun.objects.create(name=name)
+    started = time.perf_counter()
+    try:
+        yield run
+        run.success = True
+    except Exception as exc:
+        run.success = False
+        run.details['error'] = str(exc)
+        raise
+    finally:
+        run.finished_at = timezone.now()
+        run.duration_ms = int((time.perf_counter() - started) * 1000)
+        run.save()
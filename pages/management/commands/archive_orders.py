@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pages.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Переносит завершённые заказы старше N дней в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        moved = archive_orders(
+            older_than_days=options['days'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Перенесено в архив: {moved} заказов за {elapsed:.2f} с'))
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from pages.benchmark import measure, run_in_rollback
+from pages.models import Order, PromoCode, PromoCodeUsage
+
+
+# Синтетические заказы раскладываются по неделям за три года
+WEEKS = 156
+
+
+class Command(BaseCommand):
+    help = 'Замер открытия списков заказов и использований промокодов в админке на большой таблице'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        run_in_rollback(lambda: self._run(options))
+
+    def _populate(self, user, count):
+        now = timezone.now()
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        promos = PromoCode.objects.bulk_create([
+            PromoCode(code=f'BENCH-CL-{i}', discount_type='fixed', discount_amount=Decimal('5')) for i in range(50)
+        ])
+        Order.objects.bulk_create([
+            Order(
+                order_number=f'BENCH-CL-{i}',
+                user=user,
+                total_amount=Decimal('19.98'),
+                status=statuses[i % len(statuses)],
+                promo_code=promos[i % 50] if i % 10 == 0 else None,
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        pks = list(Order.objects.filter(order_number__startswith='BENCH-CL-').order_by('pk').values_list('pk', flat=True))
+        # created_at выставляется auto_now_add, поэтому даты раздаются отдельным update по неделям
+        step = max(1, len(pks) // WEEKS)
+        for week, start in enumerate(range(0, len(pks), step)):
+            moment = now - timedelta(weeks=week)
+            Order.objects.filter(pk__gte=pks[start], pk__lte=pks[min(start + step, len(pks)) - 1]).update(
+                created_at=moment, updated_at=moment,
+            )
+        PromoCodeUsage.objects.bulk_create([
+            PromoCodeUsage(
+                promo_code_id=promo_id, order_id=order_id, user=user,
+                order_amount=Decimal('19.98'), discount_amount=Decimal('5'),
+            )
+            for order_id, promo_id in Order.objects.filter(
+                order_number__startswith='BENCH-CL-', promo_code__isnull=False,
+            ).values_list('pk', 'promo_code_id').iterator(chunk_size=5000)
+        ], batch_size=5000)
+
+    def _run(self, options):
+        user = User.objects.create_superuser('bench-admin', 'bench-admin@example.com', 'bench')
+        self._populate(user, options['orders'])
+        self.stdout.write(f'Заказов в базе: {Order.objects.count()}')
+
+        factory = RequestFactory()
+        year = timezone.localdate().year
+        pages = (
+            ('Заказы', Order, ''),
+            ('Заказы, статус', Order, 'status__exact=delivered'),
+            ('Заказы, год', Order, f'created_at__year={year}'),
+            ('Использования промокодов', PromoCodeUsage, ''),
+        )
+        self.stdout.write(f'{"Страница":<28}{"запросов":>10}{"холодный, мс":>15}{"медиана, мс":>14}{"p95, мс":>10}')
+        for name, model, query in pages:
+            model_admin = admin.site._registry[model]
+
+            def load():
+                request = factory.get(f'/?{query}')
+                request.user = user
+                model_admin.changelist_view(request).render()
+
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                cold, _ = measure(load, repeat=1, warmup=0)
+            median, p95 = measure(load, repeat=options['repeat'], warmup=1)
+            self.stdout.write(f'{name:<28}{len(queries):>10}{cold:>15.1f}{median:>14.1f}{p95:>10.1f}')
@@ -0,0 +1,130 @@
+import io
+import statistics
+import threading
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from pages.models import Product
+
+
+def _environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: запросы/с и задержка одной страницы через WSGI-обработчик '
+        'с новым соединением на запрос, с постоянными соединениями и с пулом (PostgreSQL, DB_POOL=1)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Страница для замера (по умолчанию — карточка первого товара)')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на поток')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not path:
+            product = Product.objects.order_by('pk').first()
+            if product is None:
+                raise CommandError('Нет товаров — укажите --path')
+            path = reverse('shop:product_detail', args=[product.pk])
+
+        # Каждый поток создаёт своё соединение из этого словаря — режимы
+        # переключаются его правкой, а не перезапуском процесса
+        db = connections.settings['default']
+        original = {'CONN_MAX_AGE': db['CONN_MAX_AGE'], 'OPTIONS': dict(db['OPTIONS'])}
+        pooled = 'pool' in db['OPTIONS']
+        without_pool = {key: value for key, value in db['OPTIONS'].items() if key != 'pool'}
+
+        modes = [
+            ('новое соединение на запрос', 0, without_pool),
+            ('постоянные, CONN_MAX_AGE=60', 60, without_pool),
+        ]
+        if pooled:
+            modes.append(('пул psycopg', 0, original['OPTIONS']))
+
+        self.stdout.write(f'{db["ENGINE"]} {db["NAME"]}, {path}, '
+                          f'{options["threads"]} потоков × {options["requests"]} запросов')
+        connections.close_all()
+        self.stdout.write(f'Открытие соединения: {self._connect_cost():.2f} мс')
+        if not pooled:
+            self.stdout.write('Пул не настроен (нужны PostgreSQL и DB_POOL=1) — сравниваются два режима')
+
+        handler = WSGIHandler()
+        self.stdout.write(f'{"Режим":<30}{"запросов/с":>12}{"p50, мс":>10}{"p95, мс":>10}')
+        try:
+            with override_settings(ALLOWED_HOSTS=['localhost']):
+                for name, conn_max_age, db_options in modes:
+                    db['CONN_MAX_AGE'] = conn_max_age
+                    db['OPTIONS'] = db_options
+                    rate, p50, p95 = self._run(handler, path, options['threads'], options['requests'])
+                    self.stdout.write(f'{name:<30}{rate:>12.0f}{p50:>10.2f}{p95:>10.2f}')
+        finally:
+            db.update(original)
+            if pooled:
+                connection.close_pool()
+
+    def _connect_cost(self, repeat=20):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.ensure_connection()
+            samples.append((time.perf_counter() - started) * 1000)
+            connection.close()
+        return statistics.median(samples)
+
+    def _request(self, handler, path):
+        status = []
+        response = handler(_environ(path), lambda code, headers, exc_info=None: status.append(code))
+        for _ in response:
+            pass
+        # close() шлёт request_finished — там Django закрывает или оставляет соединение
+        response.close()
+        if not status[0].startswith('200'):
+            raise CommandError(f'{path}: {status[0]}')
+
+    def _run(self, handler, path, threads, requests):
+        samples = []
+        errors = []
+
+        def worker():
+            timings = []
+            try:
+                self._request(handler, path)  # прогрев: шаблоны, кэш страницы
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    self._request(handler, path)
+                    timings.append((time.perf_counter() - started) * 1000)
+            except CommandError as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+            samples.extend(timings)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise errors[0]
+        samples.sort()
+        return len(samples) / elapsed, statistics.median(samples), samples[int(len(samples) * 0.95)]
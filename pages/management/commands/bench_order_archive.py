@@ -0,0 +1,75 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pages.archive import archive_orders
+from pages.benchmark import measure, run_in_rollback
+from pages.models import Category, Order, OrderItem, Product
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости запросов к горячей таблице заказов до и после архивации'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--hot-share', type=float, default=0.1,
+                            help='Доля активных (неархивируемых) заказов')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        run_in_rollback(lambda: self._run(options))
+
+    def _run(self, options):
+        now = timezone.now()
+        users = [User(username=f'bench-archive-{i}') for i in range(options['users'])]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith='bench-archive-'))
+        category = Category.objects.create(name='Bench archive', slug='bench-archive')
+        product = Product.objects.create(name='Bench product', category=category, price=Decimal('9.99'))
+
+        hot_count = int(options['orders'] * options['hot_share'])
+        orders = []
+        for i in range(options['orders']):
+            status = random.choice(('pending', 'processing')) if i < hot_count \
+                else random.choice(Order.TERMINAL_STATUSES)
+            orders.append(Order(
+                user=random.choice(users),
+                order_number=f'BENCH-{i}',
+                total_amount=Decimal('19.98'),
+                status=status,
+            ))
+        Order.objects.bulk_create(orders, batch_size=1000)
+        bench_orders = Order.objects.filter(order_number__startswith='BENCH-')
+        bench_orders.filter(status__in=Order.TERMINAL_STATUSES).update(
+            created_at=now - timedelta(days=200),
+            updated_at=now - timedelta(days=180),
+        )
+        OrderItem.objects.bulk_create(
+            [OrderItem(order_id=order_id, product=product, quantity=2, price=product.price)
+             for order_id in bench_orders.values_list('id', flat=True)],
+            batch_size=1000,
+        )
+
+        user = users[0]
+        queries = {
+            'moizakazu (hot)': lambda: list(
+                Order.objects.filter(user=user).prefetch_related('items__product')
+            ),
+            'admin COUNT(*)': lambda: Order.objects.count(),
+            'admin date_hierarchy': lambda: list(Order.objects.dates('created_at', 'month')),
+            'active orders page': lambda: list(Order.objects.filter(status='processing')[:100]),
+        }
+
+        before = {name: measure(fn, options['repeat']) for name, fn in queries.items()}
+        moved = archive_orders(older_than_days=30, batch_size=1000)
+        after = {name: measure(fn, options['repeat']) for name, fn in queries.items()}
+
+        self.stdout.write(f'Заказов: {options["orders"]}, перенесено в архив: {moved}')
+        self.stdout.write(f'{"запрос":<24}{"до, мс":>12}{"после, мс":>12}')
+        for name in queries:
+            self.stdout.write(f'{name:<24}{before[name][0]:>12.2f}{after[name][0]:>12.2f}')
@@ -0,0 +1,59 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pages.benchmark import run_in_rollback
+from pages.models import PromoCode
+from pages.promos import PromoError, quote_promo, registry
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк: расчёт промокода через ORM против таблицы в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codes', type=int, default=1000)
+        parser.add_argument('--quotes', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        run_in_rollback(lambda: self._run(options))
+
+    def _run(self, options):
+        PromoCode.objects.bulk_create([
+            PromoCode(
+                code=f'BENCH{i}',
+                discount_type='percentage' if i % 2 else 'fixed',
+                discount_percentage=Decimal('10'),
+                discount_amount=Decimal('5'),
+                max_discount_amount=Decimal('50'),
+            )
+            for i in range(options['codes'])
+        ])
+        codes = [f'BENCH{random.randrange(options["codes"])}' for _ in range(options['quotes'])]
+        amount, delivery = Decimal('120.50'), Decimal('7')
+
+        def orm_quote(code):
+            promo = PromoCode.objects.get(code=code)
+            promo.is_valid()
+            promo.calculate_discount(float(amount), float(delivery))
+
+        def registry_quote(code):
+            try:
+                quote_promo(code, amount, delivery)
+            except PromoError:
+                pass
+
+        # Прогрев таблицы, чтобы мерить установившийся режим
+        for i in range(options['codes']):
+            registry.get(f'BENCH{i}')
+
+        for name, fn in (('ORM (get + is_valid + calculate)', orm_quote), ('PromoRegistry', registry_quote)):
+            started = time.perf_counter()
+            for code in codes:
+                fn(code)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name:<36}{len(codes) / elapsed:>12.0f} котировок/с'
+                f'{elapsed / len(codes) * 1e6:>10.1f} мкс/шт'
+            )
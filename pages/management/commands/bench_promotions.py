@@ -0,0 +1,64 @@
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pages.benchmark import measure
+from pages.models import PromotionRule
+from pages.promotions import CartLine, CompiledRule, RuleSet
+
+
+class Command(BaseCommand):
+    help = 'Замер движка акций: корзина из N позиций против M активных правил (без базы)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=1000)
+        parser.add_argument('--lines', type=int, default=100)
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        products, categories = options['products'], options['categories']
+
+        rules = []
+        for i in range(options['rules']):
+            scope = rng.choices(('product', 'category', 'all'), weights=(70, 25, 5))[0]
+            kind = rng.choices(('percentage', 'fixed', 'buy_x_get_y', 'tiered'), weights=(50, 20, 20, 10))[0]
+            rule = PromotionRule(
+                pk=i + 1,
+                name=f'Rule {i}',
+                kind=kind,
+                scope=scope,
+                percentage=Decimal(rng.randint(1, 30)),
+                amount=Decimal('0.50'),
+                buy_quantity=2,
+                get_quantity=1,
+                tiers=[[50, 3], [100, 5], [200, 8]],
+                priority=rng.randint(0, 10),
+                stackable=rng.random() < 0.8,
+                valid_from=None,
+            )
+            target = rng.randrange(products) if scope == 'product' else \
+                rng.randrange(categories) if scope == 'category' else None
+            rules.append((CompiledRule.from_model(rule), scope, target))
+        ruleset = RuleSet(rules)
+
+        lines = [
+            CartLine(
+                product_id=rng.randrange(products),
+                category_id=rng.randrange(categories),
+                quantity=rng.randint(1, 6),
+                unit_price=Decimal(rng.randint(100, 5000)) / 100,
+            )
+            for _ in range(options['lines'])
+        ]
+
+        result = ruleset.evaluate(lines)
+        median, p95 = measure(lambda: ruleset.evaluate(lines), options['repeat'])
+        self.stdout.write(
+            f'{options["lines"]} позиций × {ruleset.size} правил: '
+            f'медиана {median:.2f} мс, p95 {p95:.2f} мс; '
+            f'применено {len(result.applied)} акций, скидка ${result.discount}'
+        )
@@ -0,0 +1,50 @@
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory
+
+from pages.benchmark import measure
+from pages.ratelimit import rate_limit
+
+
+def plain_view(request):
+    return JsonResponse({'success': True})
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк: накладные расходы rate_limit и стоимость отказа 429'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        count = options['requests']
+        session = SessionStore()
+        session.create()
+
+        def make_request(ip):
+            request = factory.post('/api/apply-promo-code/', REMOTE_ADDR=ip)
+            request.session = session
+            return request
+
+        # Лимит заведомо не достигается: меряется чистая стоимость проверки
+        allowed_view = rate_limit(f'{count * 1000}/s', scope='bench-allowed')(plain_view)
+        # Корзина опустошается на прогреве: дальше только отказы
+        rejected_view = rate_limit('1/d', scope='bench-rejected')(plain_view)
+
+        requests = [make_request(f'10.0.{i // 256 % 256}.{i % 256}') for i in range(count)]
+
+        def run(view):
+            return lambda: [view(request) for request in requests]
+
+        rows = (
+            ('без декоратора', run(plain_view)),
+            ('rate_limit, запрос пропущен', run(allowed_view)),
+            ('rate_limit, ответ 429', run(rejected_view)),
+        )
+        self.stdout.write(f'{"Вариант":<32}{"медиана, мкс/запрос":>22}{"p95, мкс/запрос":>18}')
+        for name, fn in rows:
+            median, p95 = measure(fn, repeat=options['repeat'], warmup=1)
+            self.stdout.write(f'{name:<32}{median * 1000 / count:>22.1f}{p95 * 1000 / count:>18.1f}')
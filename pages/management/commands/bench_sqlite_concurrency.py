@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from pages.models import Order, OrderItem, Product
+from pages.sqlite import current_pragmas
+
+
+def _copy_database(source, target):
+    # backup, а не копирование файла: заберёт и то, что ещё лежит в -wal
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+        # Обе конфигурации стартуют с файла в журнале по умолчанию
+        dst.execute('PRAGMA journal_mode = delete')
+    finally:
+        src.close()
+        dst.close()
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Конкурентная нагрузка на SQLite: параллельные оформления заказа и чтение каталога '
+        'на копии базы — настройки SQLite по умолчанию против профиля SQLITE_PRAGMAS + BEGIN IMMEDIATE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Потоков, оформляющих заказы')
+        parser.add_argument('--readers', type=int, default=8, help='Потоков, листающих каталог')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Длительность каждого прогона')
+
+    def handle(self, *args, **options):
+        db = connections.settings['default']
+        if db['ENGINE'] != 'django.db.backends.sqlite3' or str(db['NAME']) == ':memory:':
+            raise CommandError('Нужна файловая база SQLite')
+        products = list(Product.objects.order_by('pk').values_list('pk', 'price', 'category_id')[:50])
+        if not products:
+            raise CommandError('Нет товаров для заказов')
+
+        base_options = {key: value for key, value in db['OPTIONS'].items() if key != 'transaction_mode'}
+        modes = (
+            ('SQLite по умолчанию', {}, base_options),
+            ('SQLITE_PRAGMAS + IMMEDIATE', settings.SQLITE_PRAGMAS, {**base_options, 'transaction_mode': 'IMMEDIATE'}),
+        )
+        original = {'NAME': db['NAME'], 'OPTIONS': db['OPTIONS']}
+
+        self.stdout.write(f'{options["writers"]} потоков checkout, {options["readers"]} потоков каталога, '
+                          f'{options["seconds"]:g} с на прогон, копия {db["NAME"]}')
+        header = (f'{"Режим":<28}{"заказов/с":>10}{"locked":>8}{"p95 заказа, мс":>16}'
+                  f'{"чтений/с":>10}{"p95 чтения, мс":>16}')
+        rows = []
+        connections.close_all()
+        with tempfile.TemporaryDirectory() as folder:
+            try:
+                for index, (name, pragmas, db_options) in enumerate(modes):
+                    copy = os.path.join(folder, f'bench-{index}.sqlite3')
+                    _copy_database(original['NAME'], copy)
+                    db['NAME'] = copy
+                    db['OPTIONS'] = db_options
+                    with override_settings(SQLITE_PRAGMAS=pragmas):
+                        connection.ensure_connection()
+                        actual = current_pragmas(connection.connection)
+                        connection.close()
+                        self.stdout.write(f'{name}: ' + ', '.join(f'{key}={value}' for key, value in actual.items()))
+                        rows.append((name, self._run(products, options)))
+            finally:
+                connections.close_all()
+                db.update(original)
+
+        self.stdout.write(header)
+        for name, result in rows:
+            self.stdout.write(
+                f'{name:<28}{result["checkouts"]:>10.0f}{result["locked"]:>8}{result["checkout_p95"]:>16.1f}'
+                f'{result["reads"]:>10.0f}{result["read_p95"]:>16.1f}'
+            )
+
+    def _checkout(self, products):
+        # Как в оформлении заказа: сначала чтение цен, затем запись — в одной транзакции
+        with transaction.atomic():
+            prices = dict(Product.objects.filter(pk__in=[pk for pk, _, _ in products]).values_list('pk', 'price'))
+            order = Order.objects.create(
+                # Случайный номер из Order.save() на тысячах заказов повторяется
+                order_number=f'BENCH-{uuid.uuid4().hex[:16]}',
+                total_amount=sum(prices.values(), Decimal(0)),
+                status='processing',
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=pk, quantity=1, price=price) for pk, price in prices.items()
+            ])
+
+    def _browse(self, category_id):
+        products = Product.objects.filter(category_id=category_id).order_by('-pk')
+        list(products[:24])
+        products.count()
+
+    def _run(self, products, options):
+        lock = threading.Lock()
+        result = {'checkout': [], 'read': [], 'locked': 0}
+        deadline = time.perf_counter() + options['seconds']
+
+        def worker(kind, number):
+            timings = []
+            locked = 0
+            try:
+                step = 0
+                while time.perf_counter() < deadline:
+                    step += 1
+                    started = time.perf_counter()
+                    try:
+                        if kind == 'checkout':
+                            first = (number * 7 + step * 3) % len(products)
+                            self._checkout((products * 2)[first:first + 3])
+                        else:
+                            self._browse(products[(number + step) % len(products)][2])
+                    except OperationalError as exc:
+                        # «database is locked» — то, что пользователь видит как 500
+                        if 'locked' not in str(exc):
+                            raise
+                        locked += 1
+                        continue
+                    timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections.close_all()
+            with lock:
+                result[kind].extend(timings)
+                result['locked'] += locked
+
+        threads = [threading.Thread(target=worker, args=('checkout', n)) for n in range(options['writers'])]
+        threads += [threading.Thread(target=worker, args=('read', n)) for n in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        checkouts = sorted(result['checkout'])
+        reads = sorted(result['read'])
+        return {
+            'checkouts': len(checkouts) / elapsed,
+            'locked': result['locked'],
+            'checkout_p95': _percentile(checkouts, 0.95),
+            'reads': len(reads) / elapsed,
+            'read_p95': _percentile(reads, 0.95),
+        }
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+# Как в run_worker: модуль импортируется в процессах пула до django.setup(),
+# поэтому модели и pages.images импортируются только внутри handle
+
+
+def _init_child():
+    django.setup()
+
+
+def _details(pk):
+    from PIL import Image
+
+    from pages.images import placeholder_values
+    try:
+        return pk, placeholder_values(pk), None
+    except (OSError, Image.DecompressionBombError) as exc:
+        return pk, None, str(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры и размытую заглушку (image_placeholder) у товаров, у которых её нет: '
+        'картинки декодируются в пуле процессов, запись в базу — пачками из основного процесса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--force', action='store_true', help='Пересчитать заглушки у всех товаров')
+
+    def handle(self, *args, **options):
+        from pages.models import Product
+
+        queryset = Product.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['force']:
+            queryset = queryset.filter(image_placeholder='')
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+        if not pks:
+            self.stdout.write(self.style.SUCCESS('Все заглушки уже есть'))
+            return
+
+        started = time.monotonic()
+        done = failed = 0
+        batch = []
+        fields = ['image_width', 'image_height', 'image_placeholder']
+        with ProcessPoolExecutor(
+            options['processes'], mp_context=multiprocessing.get_context('spawn'), initializer=_init_child,
+        ) as pool:
+            # Картинки мелкие и декодируются быстро — отдаём процессам пачками
+            chunksize = max(1, min(50, len(pks) // (options['processes'] * 4)))
+            for pk, values, error in pool.map(_details, pks, chunksize=chunksize):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Товар #{pk}: {error}')
+                    continue
+                if values is None:
+                    continue
+                batch.append(Product(pk=pk, **values))
+                if len(batch) >= options['batch_size']:
+                    done += self._save(Product, batch, fields)
+                    self.stdout.write(f'… {done} из {len(pks)}, {time.monotonic() - started:.0f} с')
+            done += self._save(Product, batch, fields)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Заглушек: {done}, с ошибкой: {failed}, {time.monotonic() - started:.1f} с '
+            f'({options["processes"]} процессов)'
+        ))
+
+    def _save(self, model, batch, fields):
+        # bulk_update не шлёт сигналов — рендиции и счётчики медиа не трогаются
+        model.objects.bulk_update(batch, fields)
+        count = len(batch)
+        batch.clear()
+        return count
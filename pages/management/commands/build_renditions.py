@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from pages.avatars import needs_avatar_renditions, refresh_avatar
+from pages.images import needs_renditions, refresh_renditions
+from pages.models import Category, Product, Profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает рендиции картинок товаров, категорий и аватаров, у которых их ещё нет '
+        'или сменилась картинка: старые данные, импорт каталога (bulk_create без сигналов).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересобрать все рендиции')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        built = failed = 0
+        for model in (Category, Product):
+            queryset = model.objects.exclude(Q(image='') | Q(image__isnull=True)).order_by('pk')
+            for instance in queryset.iterator(chunk_size=200):
+                if not options['force'] and not needs_renditions(instance):
+                    continue
+                renditions = refresh_renditions(instance)
+                if 'error' in renditions:
+                    failed += 1
+                    self.stderr.write(f'{model._meta.verbose_name} #{instance.pk}: {renditions["error"]}')
+                built += 1
+                if built % 100 == 0:
+                    self.stdout.write(f'… {built} картинок, {time.monotonic() - started:.0f} с')
+
+        profiles = Profile.objects.exclude(Q(avatar='') | Q(avatar__isnull=True)).order_by('pk')
+        for profile in profiles.iterator(chunk_size=200):
+            if not options['force'] and not needs_avatar_renditions(profile):
+                continue
+            renditions = refresh_avatar(profile)
+            if 'error' in renditions:
+                failed += 1
+                self.stderr.write(f'Аватар профиля #{profile.pk}: {renditions["error"]}')
+            built += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Собрано рендиций: {built - failed}, с ошибкой: {failed}, {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from pages.assets import brotli, build_report
+
+
+def _mb(size):
+    return f'{size / 1024 / 1024:.2f} МБ'
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статику в STATIC_ROOT: имена с хешем содержимого, .gz/.br рядом, '
+        'без неиспользуемых дубликатов — и печатает отчёт о размерах до и после.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-clear', action='store_true',
+                            help='Не очищать STATIC_ROOT перед сборкой')
+
+    def handle(self, *args, **options):
+        call_command('collectstatic', interactive=False, clear=not options['no_clear'], verbosity=0)
+
+        hashed_names = set(staticfiles_storage.load_manifest()[0].values())
+        report = build_report(settings.STATIC_ROOT, hashed_names)
+        self.stdout.write(
+            f'До:    {report["before_files"]} файлов, {_mb(report["before_bytes"])}; '
+            f'CSS/JS/SVG по сети {_mb(report["before_text_bytes"])}'
+        )
+        self.stdout.write(
+            f'Исключено дубликатов: {len(report["stripped"])}, {_mb(report["stripped_bytes"])} '
+            f'({", ".join(report["stripped"]) or "—"})'
+        )
+        self.stdout.write(
+            f'После: {report["after_files"]} файлов, {_mb(report["after_bytes"])}; '
+            f'CSS/JS/SVG по сети gzip {_mb(report["after_text_gzip_bytes"])}'
+            + (f', brotli {_mb(report["after_text_brotli_bytes"])}' if brotli is not None
+               else ' (brotli не установлен — .br не собраны)')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {settings.STATIC_ROOT}. Файлы с хешем в имени отдаются с Cache-Control immutable — '
+            'при повторном визите браузер их не запрашивает.'
+        ))
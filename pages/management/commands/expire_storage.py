@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from pages.courier import EXPIRY_BATCH_SIZE, EXPIRY_MAX_BATCHES, expire_storage_deadlines
+from pages.jobs import job_run
+
+
+class Command(BaseCommand):
+    help = (
+        'Возвращает на склад доставленные заказы с истёкшим сроком хранения. '
+        'Рассчитана на запуск каждые несколько минут (cron / systemd timer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=EXPIRY_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=EXPIRY_MAX_BATCHES)
+
+    def handle(self, *args, **options):
+        with job_run('expire_storage') as run:
+            processed, batches, has_more = expire_storage_deadlines(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+            )
+            run.processed = processed
+            run.details = {'batches': batches, 'has_more': has_more}
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Возвращено на склад: {processed} заказов, пачек: {batches}, {run.duration_ms} мс'
+            + (' (осталось ещё)' if has_more else '')
+        ))
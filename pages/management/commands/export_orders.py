@@ -0,0 +1,38 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_KINDS, filter_orders, stream_export
+from pages.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка заказов или позиций заказов (вместе с архивными) в CSV / JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(EXPORT_KINDS), default='orders')
+        parser.add_argument('--format', dest='fmt', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--from', dest='date_from', type=date.fromisoformat, help='YYYY-MM-DD, включительно')
+        parser.add_argument('--to', dest='date_to', type=date.fromisoformat, help='YYYY-MM-DD, включительно')
+        parser.add_argument('--status', action='append', choices=[value for value, _ in Order.STATUS_CHOICES])
+        parser.add_argument('--output', '-o', help='Файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['date_from'] and options['date_to'] and options['date_from'] > options['date_to']:
+            raise CommandError('--from позже --to')
+        filters = {'date_from': options['date_from'], 'date_to': options['date_to'], 'statuses': options['status']}
+        orders = filter_orders(**filters)
+        archived = filter_orders(model=ArchivedOrder, **filters)
+        blocks = stream_export(orders, options['kind'], options['fmt'], options['chunk_size'], archived)
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for block in blocks:
+                output.write(block)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f'Выгрузка записана в {options["output"]}'))
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from pages.blobs import GC_GRACE, collect_garbage
+from pages.jobs import job_run
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки на файлы хранилища по хешу (MediaBlob) и удаляет файлы, '
+        'на которые больше никто не ссылается. Рассчитана на запуск раз в час–сутки (cron / systemd timer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=int(GC_GRACE.total_seconds() // 60),
+                            help='Не удалять файлы, которые трогали позже, чем столько минут назад')
+
+    def handle(self, *args, **options):
+        with job_run('gc_media_blobs') as run:
+            deleted, freed = collect_garbage(timedelta(minutes=options['grace_minutes']))
+            run.processed = deleted
+            run.details = {'freed_bytes': freed}
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {deleted}, освобождено {freed / 1024 / 1024:.1f} МБ, {run.duration_ms} мс'
+        ))
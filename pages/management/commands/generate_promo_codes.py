@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.models import PromoCodeRandomizer
+from pages.promos import GENERATE_CHUNK_SIZE, generate_promo_codes
+
+
+class Command(BaseCommand):
+    help = 'Массовая генерация промокодов по шаблону PromoCodeRandomizer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('template_id', type=int)
+        parser.add_argument('count', type=int)
+        parser.add_argument('--chunk-size', type=int, default=GENERATE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            template = PromoCodeRandomizer.objects.get(pk=options['template_id'])
+        except PromoCodeRandomizer.DoesNotExist:
+            raise CommandError(f'Шаблон #{options["template_id"]} не найден')
+        if options['count'] < 1:
+            raise CommandError('Количество должно быть больше нуля')
+
+        started = time.perf_counter()
+
+        def progress(created, total):
+            self.stdout.write(f'  {created}/{total}')
+
+        created = generate_promo_codes(template, options['count'], options['chunk_size'], progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Создано {created} промокодов за {elapsed:.1f} с'))
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, ImportFileError, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = 'Импорт каталога из CSV / JSONL: upsert по sku, категории по слагу, картинки из каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='fmt', choices=IMPORT_FORMATS, help='По умолчанию — по расширению файла')
+        parser.add_argument('--images-dir', default=getattr(settings, 'CATALOG_IMPORT_IMAGES_DIR', None))
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля')
+        fmt = options['fmt'] or detect_format(options['path'])
+        started = time.perf_counter()
+
+        def progress(result):
+            self.stdout.write(f'  создано {result.created}, обновлено {result.updated}, пропущено {result.skipped}')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = import_products(stream, fmt, options['images_dir'], options['batch_size'], progress)
+        except OSError as exc:
+            raise CommandError(f'Не удалось прочитать файл: {exc}')
+        except ImportFileError as exc:
+            result = exc.result
+            raise CommandError(
+                f'Не удалось прочитать файл: {exc} '
+                f'(создано {result.created}, обновлено {result.updated}, пропущено {result.skipped})'
+            )
+
+        for line, message in result.errors:
+            self.stderr.write(f'  строка {line}: {message}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {result.created}, обновлено {result.updated}, без изменений {result.unchanged}, '
+            f'пропущено {result.skipped}, '
+            f'новых категорий {result.categories_created} за {elapsed:.1f} с'
+        ))
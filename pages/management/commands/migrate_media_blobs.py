@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from pages.blobs import migrate_legacy_files
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки товаров, категорий и аватары со старыми именами '
+        '(products/x_AbCdEf.jpg) в хранилище по хешу: одинаковые файлы сливаются в один.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-legacy', action='store_true',
+                            help='Не удалять старые файлы после переноса')
+
+    def handle(self, *args, **options):
+        moved, removed, bytes_before, bytes_after = migrate_legacy_files(
+            delete_legacy=not options['keep_legacy'],
+            progress=lambda done: self.stdout.write(f'  перенесено {done}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено записей: {moved}, удалено старых файлов: {removed}. '
+            f'На диске: {bytes_before / 1024 / 1024:.1f} МБ -> {bytes_after / 1024 / 1024:.1f} МБ'
+        ))
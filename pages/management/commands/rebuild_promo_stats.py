@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from pages.jobs import job_run
+from pages.promos import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суточные сводки по промокодам из журнала использований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, default=None, help='YYYY-MM-DD')
+        parser.add_argument('--until', type=date.fromisoformat, default=None, help='YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        with job_run('rebuild_promo_stats') as run:
+            run.processed = rebuild_daily_stats(options['since'], options['until'])
+        self.stdout.write(self.style.SUCCESS(f'Записано строк сводки: {run.processed} за {run.duration_ms} мс'))
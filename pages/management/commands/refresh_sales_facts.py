@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from pages.jobs import job_run
+from pages.sales import SALES_JOB_NAME, refresh_sales_facts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает витрину продаж за дни, затронутые изменёнными заказами. '
+        'Рассчитана на запуск раз в несколько минут (cron / systemd timer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересобрать витрину по всей истории (нужно после удаления заказов)')
+
+    def handle(self, *args, **options):
+        with job_run(SALES_JOB_NAME) as run:
+            days, watermark = refresh_sales_facts(full=options['full'])
+            run.processed = days
+            run.details = {'watermark': watermark.isoformat(), 'full': options['full']}
+
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано дней: {days}, {run.duration_ms} мс'))
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+# Модуль импортируется в процессах пула до django.setup() (ради _init_child),
+# поэтому pages.taskqueue с моделями импортируется только внутри handle
+
+
+def _init_child():
+    # spawn: процесс пула поднимает Django с нуля и не делит с воркером
+    # соединения с базой; Ctrl+C обрабатывает только сам воркер
+    django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди фоновых задач (pages/taskqueue.py): забирает задачи из базы и '
+        'выполняет их в пуле процессов. Останавливается по SIGTERM / Ctrl+C, дождавшись текущих задач.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                            help='Размер пула; 0 — выполнять задачи в самом воркере')
+        parser.add_argument('--visibility-timeout', type=int,
+                            help='Через сколько секунд без продления задачу заберёт другой воркер '
+                                 '(по умолчанию taskqueue.VISIBILITY_TIMEOUT)')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--max-tasks-per-child', type=int, default=500,
+                            help='Перезапускать процесс пула после N задач (память Pillow)')
+        parser.add_argument('--once', action='store_true', help='Выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        from pages import taskqueue
+        self.queue = taskqueue
+        options['visibility_timeout'] = options['visibility_timeout'] or taskqueue.VISIBILITY_TIMEOUT
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'[:48]
+        self.options = options
+        self.stopping = False
+        self.counts = {'done': 0, 'retry': 0, 'failed': 0}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._stop)
+
+        self.stdout.write(f'Воркер {self.worker_id}, процессов: {options["processes"] or "без пула"}')
+        if options['processes']:
+            self._run_pool()
+        else:
+            self._run_inline()
+        self.stdout.write(self.style.SUCCESS(
+            f'Остановлен. Выполнено: {self.counts["done"]}, повторов: {self.counts["retry"]}, '
+            f'с ошибкой: {self.counts["failed"]}'
+        ))
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        self.stopping = True
+        self.stdout.write('Остановка: дожидаемся текущих задач (повторный сигнал — прервать)')
+
+    def _claim(self, limit):
+        try:
+            return self.queue.claim_tasks(self.worker_id, limit, self.options['visibility_timeout'])
+        except OperationalError as exc:
+            # SQLite занята другим писателем — заберём на следующем круге
+            self.stderr.write(f'Не удалось забрать задачи: {exc}')
+            return []
+
+    def _complete(self, task_row, error):
+        outcome = self.queue.complete_task(task_row, error)
+        self.counts[outcome] += 1
+        if error:
+            self.stderr.write(f'{task_row.name} #{task_row.pk} ({outcome}): {error.strip().splitlines()[-1]}')
+
+    def _run_inline(self):
+        while not self.stopping:
+            tasks = self._claim(1)
+            if not tasks:
+                if self.options['once']:
+                    break
+                time.sleep(self.options['poll_interval'])
+                continue
+            for task_row in tasks:
+                self._complete(task_row, self.queue.execute(task_row.name, task_row.args, task_row.kwargs))
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            self.options['processes'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_child,
+            max_tasks_per_child=self.options['max_tasks_per_child'],
+        )
+
+    def _run_pool(self):
+        processes = self.options['processes']
+        poll_interval = self.options['poll_interval']
+        # Аренда продлевается заранее, с запасом в две трети таймаута
+        heartbeat_every = self.options['visibility_timeout'] / 3
+        last_heartbeat = time.monotonic()
+        pool = self._new_pool()
+        in_flight = {}
+        try:
+            while True:
+                # Небольшой запас сверх числа процессов, чтобы пул не простаивал между кругами
+                free = processes * 2 - len(in_flight)
+                if not self.stopping and free > 0:
+                    for task_row in self._claim(free):
+                        in_flight[pool.submit(self.queue.execute, task_row.name, task_row.args, task_row.kwargs)] = task_row
+                if not in_flight:
+                    if self.stopping or self.options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                finished, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    task_row = in_flight.pop(future)
+                    try:
+                        error = future.result()
+                    except BrokenProcessPool:
+                        # Процесс пула убит (OOM, сегфолт в кодеке) — задача уйдёт на повтор
+                        broken = True
+                        error = traceback.format_exc()
+                    self._complete(task_row, error)
+                if broken:
+                    # Остальные задачи сломанного пула тоже не выполнятся
+                    for task_row in in_flight.values():
+                        self._complete(task_row, 'BrokenProcessPool: процесс пула завершился аварийно')
+                    in_flight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+
+                if time.monotonic() - last_heartbeat >= heartbeat_every:
+                    self.queue.extend_lease({task_row.locked_by for task_row in in_flight.values()},
+                                            self.options['visibility_timeout'])
+                    last_heartbeat = time.monotonic()
+        finally:
+            pool.shutdown(wait=True)
@@ -0,0 +1,190 @@
+"""
+Отдача MEDIA в продакшене (загрузки, рендиции, файлы хранилища по хешу).
+
+Django проверяет только то, что дёшево: путь, stat файла, условные
+заголовки. 304 на If-None-Match / If-Modified-Since отвечается без
+чтения файла. Сами байты, в зависимости от MEDIA_SENDFILE:
+
+* 'x-accel-redirect' — отдаёт nginx: ответ с заголовком
+  X-Accel-Redirect: MEDIA_ACCEL_REDIRECT_PREFIX + путь, а в nginx —
+  ``location /protected-media/ { internal; alias <MEDIA_ROOT>/; }``;
+  Range nginx обрабатывает сам;
+* 'x-sendfile' — то же для Apache mod_xsendfile / lighttpd (абсолютный путь);
+* None — сам Django: целый файл — FileResponse на настоящем файле, его
+  WSGI-сервер (gunicorn, uWSGI) отдаёт через sendfile(), не занимая воркер
+  копированием; Range — 206 с одним диапазоном, потоком по кускам.
+
+Имя blob'а — хеш содержимого, поэтому blobs/ кэшируются на год без
+перепроверки; остальное — на сутки с проверкой по ETag.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from pages.storage import BLOB_PREFIX
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) включительно по заголовку Range или None — отдать файл
+    целиком (нет заголовка, несколько диапазонов, чужие единицы).
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if size == 0:
+        # У пустого файла нет ни одного байта, который можно отдать куском
+        raise RangeNotSatisfiable
+    if not start:
+        # bytes=-500 — последние 500 байт
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class RangeFile:
+    """
+    Кусок файла для FileResponse. Без tell/seek/fileno нарочно: FileResponse
+    не пересчитает Content-Length по всему файлу, а WSGI-сервер не отдаст
+    его целиком через sendfile.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _etag(stat_result):
+    return f'"{stat_result.st_size:x}-{int(stat_result.st_mtime):x}"'
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return if_none_match.strip() == '*' or etag in if_none_match
+    return not was_modified_since(request.headers.get('If-Modified-Since'), mtime)
+
+
+def _range_applies(request, etag, mtime):
+    # If-Range: диапазон — только если файл не изменился с прошлой загрузки куска
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _offload(response, path):
+    backend = getattr(settings, 'MEDIA_SENDFILE', None)
+    if backend == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+    elif backend == 'x-sendfile':
+        response['X-Sendfile'] = safe_join(settings.MEDIA_ROOT, path)
+    else:
+        return None
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    # Путь за пределами MEDIA_ROOT (../) — SuspiciousFileOperation, ответ 400
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    try:
+        stat_result = os.stat(full_path)
+    except OSError:
+        raise Http404('Файл не найден')
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404('Файл не найден')
+
+    size = stat_result.st_size
+    etag = _etag(stat_result)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat_result.st_mtime),
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if path.startswith(BLOB_PREFIX) else MEDIA_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes',
+    }
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return HttpResponseNotModified(headers=headers)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if encoding:
+        # .gz и т.п. — отдаём как есть, браузер не должен распаковывать
+        content_type = 'application/octet-stream'
+
+    offloaded = _offload(HttpResponse(content_type=content_type, headers=headers), path)
+    if offloaded is not None:
+        return offloaded
+
+    # Устаревший If-Range — отдаём файл целиком, даже если Range за его пределами
+    byte_range = None
+    if _range_applies(request, etag, stat_result.st_mtime):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            headers['Content-Range'] = f'bytes */{size}'
+            return HttpResponse(status=416, headers=headers)
+
+    status = 200
+    length = size
+    if byte_range is not None:
+        start, end = byte_range
+        status = 206
+        length = end - start + 1
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    if request.method == 'HEAD':
+        return HttpResponse(status=status, content_type=content_type,
+                            headers={**headers, 'Content-Length': str(length)})
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, headers=headers)
+    else:
+        response = FileResponse(RangeFile(file, byte_range[0], length), status=status,
+                                content_type=content_type, headers=headers)
+    response['Content-Length'] = str(length)
+    return response
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0025_usersettings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(max_length=50, unique=True, verbose_name='Номер заказа')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Сумма товаров')),
+                ('delivery_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Стоимость доставки')),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Сумма скидки')),
+                ('delivery_city', models.CharField(blank=True, max_length=100, null=True, verbose_name='Город доставки')),
+                ('delivery_distance', models.IntegerField(default=0, verbose_name='Расстояние (км)')),
+                ('pickup_point', models.CharField(blank=True, default='Not specified', max_length=200, verbose_name='Пункт выдачи')),
+                ('status', models.CharField(choices=[('pending', 'В ожидании'), ('processing', 'Собирается'), ('shipping', 'Доставляется'), ('delivered', 'Доставлен'), ('picked-up', 'Выдан покупателю'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Последнее обновление')),
+                ('storage_deadline', models.DateTimeField(blank=True, null=True, verbose_name='Срок хранения')),
+                ('notes', models.TextField(blank=True, verbose_name='Примечания')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архив заказов',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена на момент заказа')),
+            ],
+            options={
+                'verbose_name': 'Позиция архивного заказа',
+                'verbose_name_plural': 'Позиции архивных заказов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'updated_at'], name='order_status_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='promo_code',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pages.promocode', verbose_name='Промокод'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddField(
+            model_name='promocodeusage',
+            name='archived_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='promo_usages', to='pages.archivedorder', verbose_name='Архивный заказ'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='pages.archivedorder', verbose_name='Заказ'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pages.product', verbose_name='Продукт'),
+        ),
+    ]
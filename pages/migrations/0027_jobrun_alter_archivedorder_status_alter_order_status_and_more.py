@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:16
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0026_archivedorder_archivedorderitem_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Задача')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Длительность (мс)')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('success', models.BooleanField(null=True, verbose_name='Успешно')),
+                ('details', models.JSONField(blank=True, default=dict, verbose_name='Детали')),
+            ],
+            options={
+                'verbose_name': 'Запуск задачи',
+                'verbose_name_plural': 'Запуски задач',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='archivedorder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В ожидании'), ('processing', 'Собирается'), ('shipping', 'Доставляется'), ('delivered', 'Доставлен'), ('picked-up', 'Выдан покупателю'), ('returned', 'Возвращён на склад'), ('cancelled', 'Отменён')], max_length=20, verbose_name='Статус'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В ожидании'), ('processing', 'Собирается'), ('shipping', 'Доставляется'), ('delivered', 'Доставлен'), ('picked-up', 'Выдан покупателю'), ('returned', 'Возвращён на склад'), ('cancelled', 'Отменён')], default='pending', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'storage_deadline'], name='order_status_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobrun',
+            index=models.Index(fields=['name', '-started_at'], name='jobrun_name_started_idx'),
+        ),
+    ]
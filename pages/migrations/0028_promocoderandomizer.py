@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:20
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0027_jobrun_alter_archivedorder_status_alter_order_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromoCodeRandomizer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название шаблона')),
+                ('discount_type', models.CharField(choices=[('percentage', 'Процент от суммы'), ('fixed', 'Фиксированная сумма'), ('free_shipping', 'Бесплатная доставка')], max_length=20, verbose_name='Тип скидки')),
+                ('min_percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Минимальный процент')),
+                ('max_percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Максимальный процент')),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Минимальная сумма скидки ($)')),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Максимальная сумма скидки ($)')),
+                ('minimum_order_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Минимальная сумма заказа ($)')),
+                ('usage_limit', models.IntegerField(blank=True, default=1, help_text='Для одноразовых кодов — 1', null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Лимит использований')),
+                ('valid_days', models.IntegerField(default=30, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Срок действия (дней)')),
+                ('code_prefix', models.CharField(blank=True, help_text='Например: SALE, PROMO, NEW', max_length=10, verbose_name='Префикс кода')),
+                ('code_length', models.PositiveSmallIntegerField(default=8, validators=[django.core.validators.MinValueValidator(6), django.core.validators.MaxValueValidator(10)], verbose_name='Длина случайной части')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Шаблон рандомайзера',
+                'verbose_name_plural': 'Шаблоны рандомайзера',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0028_promocoderandomizer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocode',
+            name='generated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='codes', to='pages.promocoderandomizer', verbose_name='Шаблон генерации'),
+        ),
+    ]
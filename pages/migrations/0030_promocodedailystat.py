@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0029_promocode_generated_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromoCodeDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('redemptions', models.PositiveIntegerField(default=0, verbose_name='Использований')),
+                ('gross_order_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма заказов ($)')),
+                ('total_discount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма скидок ($)')),
+                ('promo_code', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='pages.promocode', verbose_name='Промокод')),
+            ],
+            options={
+                'verbose_name': 'Сводка по промокоду за день',
+                'verbose_name_plural': 'Отчёт по промокодам',
+                'ordering': ['-day', 'promo_code'],
+                'indexes': [models.Index(fields=['day'], name='promo_daily_stat_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('promo_code', 'day'), name='promo_daily_stat_unique')],
+            },
+        ),
+    ]
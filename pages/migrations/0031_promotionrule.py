@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:23
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0030_promocodedailystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название')),
+                ('kind', models.CharField(choices=[('percentage', 'Процент от позиции'), ('fixed', 'Фиксированная скидка за единицу'), ('buy_x_get_y', 'Купи X — получи Y бесплатно'), ('tiered', 'Ступенчатая скидка от суммы корзины')], max_length=20, verbose_name='Тип акции')),
+                ('scope', models.CharField(choices=[('all', 'Все товары'), ('category', 'Категория'), ('product', 'Товар')], default='all', max_length=20, verbose_name='Применяется к')),
+                ('percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Процент скидки')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Сумма скидки ($)')),
+                ('buy_quantity', models.PositiveIntegerField(blank=True, null=True, verbose_name='Купи (шт.)')),
+                ('get_quantity', models.PositiveIntegerField(blank=True, null=True, verbose_name='Получи бесплатно (шт.)')),
+                ('tiers', models.JSONField(blank=True, default=list, help_text='Список [порог суммы, процент], например [[50, 5], [100, 10]]', verbose_name='Ступени')),
+                ('priority', models.IntegerField(default=0, help_text='Больше — раньше', verbose_name='Приоритет')),
+                ('stackable', models.BooleanField(default=True, help_text='Если выключено, акции с меньшим приоритетом к позиции не применяются', verbose_name='Суммируется')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+                ('valid_from', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Действует с')),
+                ('valid_until', models.DateTimeField(blank=True, null=True, verbose_name='Действует до')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pages.category', verbose_name='Категория')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pages.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Акция',
+                'verbose_name_plural': 'Акции',
+                'ordering': ['-priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0032_product_sku'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategoryFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Город доставки')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов с категорией')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Единиц товара')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка ($)')),
+            ],
+            options={
+                'verbose_name': 'Продажи категории за день',
+                'verbose_name_plural': 'Продажи по категориям',
+                'ordering': ['-day', 'category'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyOrderFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Город доставки')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('items', models.PositiveIntegerField(default=0, verbose_name='Единиц товара')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка по товарам ($)')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Скидки ($)')),
+                ('delivery_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Доставка ($)')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи по дням',
+                'ordering': ['-day', 'city'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['archived_at'], name='archived_order_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailycategoryfact',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_facts', to='pages.category', verbose_name='Категория'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyorderfact',
+            constraint=models.UniqueConstraint(fields=('day', 'city'), name='daily_order_fact_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='dailycategoryfact',
+            index=models.Index(fields=['day', 'category'], name='daily_category_fact_idx'),
+        ),
+    ]
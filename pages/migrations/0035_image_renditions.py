@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0034_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Рендиции изображения'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Рендиции изображения'),
+        ),
+    ]
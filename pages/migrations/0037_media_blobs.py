@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:18
+
+import pages.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0036_task_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.blob_storage, upload_to='category_images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.blob_storage, upload_to='products/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=pages.storage.blob_storage, upload_to='avatars/', verbose_name='Аватар'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Путь')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Размер (байт)')),
+                ('refcount', models.IntegerField(default=0, verbose_name='Ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменён')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['refcount', 'updated_at'], name='mediablob_refcount_idx')],
+            },
+        ),
+    ]
@@ -3,16 +3,22 @@ from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.utils import timezone
 from datetime import timedelta
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import random
-import string
+
+from pages.storage import blob_storage
 
 
 class Category(models.Model):
     name = models.CharField(max_length=255, verbose_name='Название')
     slug = models.SlugField(unique=True, blank=True, verbose_name='Слаг')
-    image = models.ImageField(upload_to='category_images/', blank=True, null=True, verbose_name='Изображение')
+    image = models.ImageField(
+        upload_to='category_images/', storage=blob_storage, blank=True, null=True, verbose_name='Изображение'
+    )
+    # Уменьшенные копии image для srcset (pages/images.py)
+    renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Рендиции изображения')
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -34,11 +40,21 @@ class Product(models.Model):
         ('pcs', 'Pieces'),
     ]
 
+    # Артикул поставщика: по нему импорт каталога находит существующие товары
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True, verbose_name='Артикул (SKU)')
     name = models.CharField(max_length=200, verbose_name='Название')
     description = models.TextField(blank=True, default='No description', verbose_name='Описание')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Категория')
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Цена')
-    image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='Изображение')
+    image = models.ImageField(
+        upload_to='products/', storage=blob_storage, blank=True, null=True, verbose_name='Изображение'
+    )
+    renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Рендиции изображения')
+    # Заполняются вместе с рендициями (pages/images.py): размеры оригинала для
+    # width/height в вёрстке и размытая миниатюра-заглушка (data: URI, ~0.5–1 КБ)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Ширина изображения')
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Высота изображения')
+    image_placeholder = models.TextField(blank=True, default='', editable=False, verbose_name='Заглушка изображения')
     unit_type = models.CharField(max_length=10, choices=UNIT_CHOICES, default='pcs', verbose_name='Единица измерения')
     created_at = models.DateTimeField(default=timezone.now, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
@@ -50,6 +66,10 @@ class Product(models.Model):
         verbose_name = 'Продукт'
         verbose_name_plural = 'Продукты'
         ordering = ['-created_at']
+        indexes = [
+            # Сортировка и иерархия дат в админке (pages/admin_mixins.py)
+            models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+        ]
 
 
 class CartItem(models.Model):
@@ -174,6 +194,17 @@ class PromoCode(models.Model):
         help_text='Текст для клиента'
     )
 
+    # Код создан массовой генерацией (одноразовые коды не показываются в корзине)
+    generated_by = models.ForeignKey(
+        'PromoCodeRandomizer',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='codes',
+        verbose_name='Шаблон генерации'
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -195,77 +226,233 @@ class PromoCode(models.Model):
         return "Неизвестная скидка"
 
     def is_valid(self):
-        now = timezone.now()
-
-        if not self.is_active:
-            return False, "Промокод неактивен"
-
-        if self.valid_from and now < self.valid_from:
-            return False, "Промокод еще не активен"
-
-        if self.valid_until and now > self.valid_until:
-            return False, "Промокод истек"
-
-        if self.usage_limit and self.times_used >= self.usage_limit:
-            return False, "Промокод уже использован максимальное количество раз"
-
-        return True, "Промокод действителен"
+        from pages.promos import PromoRule
+        return PromoRule.from_model(self).check()
 
     def calculate_discount(self, order_amount, delivery_cost=0):
         """
         Вычисляет скидку на основе типа промокода.
         Возвращает: (discount_amount, free_shipping, message)
         """
+        from pages.promos import PromoRule
         # Приводим всё к Decimal, чтобы не было конфликта типов
-        order_amount = Decimal(str(order_amount))
-        delivery_cost = Decimal(str(delivery_cost))
+        return PromoRule.from_model(self).calculate(Decimal(str(order_amount)), Decimal(str(delivery_cost)))
 
-        if order_amount < self.minimum_order_amount:
-            return Decimal('0'), False, f"Минимальная сумма заказа: ${self.minimum_order_amount}"
+    def use(self):
+        """
+        Атомарно увеличить счетчик использований, не выходя за usage_limit.
+        Один условный UPDATE — параллельные оформления не теряют инкременты.
+        Возвращает False, если лимит уже исчерпан или промокод выключен.
+        """
+        updated = PromoCode.objects.filter(pk=self.pk, is_active=True).filter(
+            models.Q(usage_limit__isnull=True) | models.Q(times_used__lt=models.F('usage_limit'))
+        ).update(times_used=models.F('times_used') + 1)
+        if updated:
+            self.refresh_from_db(fields=['times_used', 'usage_limit'])
+        return bool(updated)
 
-        discount_amount = Decimal('0')
-        free_shipping = False
+    @staticmethod
+    def generate_random_code(length=8):
+        from pages.promos import unique_codes
+        return next(unique_codes(count=1, length=length))[0]
 
-        if self.discount_type == 'percentage':
-            # ПРОЦЕНТНАЯ СКИДКА
-            discount_amount = (order_amount * self.discount_percentage) / Decimal('100')
 
-            # Применяем максимальное ограничение
-            if self.max_discount_amount and discount_amount > self.max_discount_amount:
-                discount_amount = self.max_discount_amount
+class PromoCodeRandomizer(models.Model):
+    """Шаблон для массовой генерации одноразовых промокодов (см. pages/promos.py)."""
+    name = models.CharField(max_length=100, verbose_name='Название шаблона')
+    discount_type = models.CharField(
+        max_length=20,
+        choices=PromoCode.DISCOUNT_TYPE_CHOICES,
+        verbose_name='Тип скидки'
+    )
 
-            message = f"Скидка {self.discount_percentage}%"
-            if self.max_discount_amount:
-                message += f" (макс. ${self.max_discount_amount})"
+    min_percentage = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        verbose_name='Минимальный процент'
+    )
+    max_percentage = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        verbose_name='Максимальный процент'
+    )
+    min_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0)],
+        verbose_name='Минимальная сумма скидки ($)'
+    )
+    max_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0)],
+        verbose_name='Максимальная сумма скидки ($)'
+    )
 
-        elif self.discount_type == 'fixed':
-            # ФИКСИРОВАННАЯ СКИДКА
-            discount_amount = min(self.discount_amount, order_amount)
-            message = f"Скидка ${self.discount_amount}"
+    minimum_order_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0,
+        verbose_name='Минимальная сумма заказа ($)'
+    )
+    usage_limit = models.IntegerField(
+        null=True, blank=True, default=1,
+        validators=[MinValueValidator(1)],
+        verbose_name='Лимит использований',
+        help_text='Для одноразовых кодов — 1'
+    )
+    valid_days = models.IntegerField(default=30, validators=[MinValueValidator(1)], verbose_name='Срок действия (дней)')
+    code_prefix = models.CharField(max_length=10, blank=True, verbose_name='Префикс кода', help_text='Например: SALE, PROMO, NEW')
+    code_length = models.PositiveSmallIntegerField(
+        default=8,
+        validators=[MinValueValidator(6), MaxValueValidator(10)],
+        verbose_name='Длина случайной части'
+    )
+    is_active = models.BooleanField(default=True, verbose_name='Активен')
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        elif self.discount_type == 'free_shipping':
-            # БЕСПЛАТНАЯ ДОСТАВКА
-            free_shipping = True
-            discount_amount = Decimal('0')
-            message = "Бесплатная доставка"
+    class Meta:
+        verbose_name = 'Шаблон рандомайзера'
+        verbose_name_plural = 'Шаблоны рандомайзера'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
 
-        else:
-            message = "Неверный тип скидки"
+    def _random_between(self, low, high):
+        low = low or Decimal('0')
+        high = high if high is not None else low
+        if high <= low:
+            return low
+        cents = random.randint(int(low * 100), int(high * 100))
+        return Decimal(cents) / 100
+
+    def build_code(self, code, valid_from, valid_until):
+        """Несохранённый PromoCode по шаблону — для bulk_create."""
+        return PromoCode(
+            code=code,
+            discount_type=self.discount_type,
+            discount_percentage=self._random_between(self.min_percentage, self.max_percentage)
+            if self.discount_type == 'percentage' else None,
+            discount_amount=self._random_between(self.min_amount, self.max_amount)
+            if self.discount_type == 'fixed' else None,
+            minimum_order_amount=self.minimum_order_amount,
+            usage_limit=self.usage_limit,
+            valid_from=valid_from,
+            valid_until=valid_until,
+            description=self.name,
+            generated_by=self,
+        )
+
+
+class PromotionRule(models.Model):
+    """
+    Автоматическая акция (без кода): считается движком pages/promotions.py
+    по всем позициям корзины за один проход.
+    """
+    KIND_CHOICES = [
+        ('percentage', 'Процент от позиции'),
+        ('fixed', 'Фиксированная скидка за единицу'),
+        ('buy_x_get_y', 'Купи X — получи Y бесплатно'),
+        ('tiered', 'Ступенчатая скидка от суммы корзины'),
+    ]
+    SCOPE_CHOICES = [
+        ('all', 'Все товары'),
+        ('category', 'Категория'),
+        ('product', 'Товар'),
+    ]
 
-        return discount_amount, free_shipping, message
+    name = models.CharField(max_length=200, verbose_name='Название')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Тип акции')
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES, default='all', verbose_name='Применяется к')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Категория')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Товар')
 
-    def use(self):
-        """Увеличить счетчик использований"""
-        self.times_used += 1
-        self.save(update_fields=['times_used'])
+    percentage = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        verbose_name='Процент скидки'
+    )
+    amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0)],
+        verbose_name='Сумма скидки ($)'
+    )
+    buy_quantity = models.PositiveIntegerField(null=True, blank=True, verbose_name='Купи (шт.)')
+    get_quantity = models.PositiveIntegerField(null=True, blank=True, verbose_name='Получи бесплатно (шт.)')
+    tiers = models.JSONField(
+        default=list, blank=True,
+        verbose_name='Ступени',
+        help_text='Список [порог суммы, процент], например [[50, 5], [100, 10]]'
+    )
+
+    priority = models.IntegerField(default=0, verbose_name='Приоритет', help_text='Больше — раньше')
+    stackable = models.BooleanField(
+        default=True,
+        verbose_name='Суммируется',
+        help_text='Если выключено, акции с меньшим приоритетом к позиции не применяются'
+    )
+    is_active = models.BooleanField(default=True, verbose_name='Активна')
+    valid_from = models.DateTimeField(default=timezone.now, verbose_name='Действует с')
+    valid_until = models.DateTimeField(null=True, blank=True, verbose_name='Действует до')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Акция'
+        verbose_name_plural = 'Акции'
+        ordering = ['-priority', 'id']
+
+    # Поля, без которых тип акции ничего не считает
+    KIND_FIELDS = {
+        'percentage': ('percentage',),
+        'fixed': ('amount',),
+        'buy_x_get_y': ('buy_quantity', 'get_quantity'),
+        'tiered': ('tiers',),
+    }
+
+    def __str__(self):
+        return self.name
 
     @staticmethod
-    def generate_random_code(length=8):
-        characters = string.ascii_uppercase + string.digits
-        while True:
-            code = ''.join(random.choice(characters) for _ in range(length))
-            if not PromoCode.objects.filter(code=code).exists():
-                return code
+    def _tier_number(value):
+        # bool — подкласс int, но [true, 5] ступенью не считается
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError
+        number = Decimal(str(value))
+        if not number.is_finite():
+            raise ValueError
+        return number
+
+    def _tier_errors(self):
+        if not isinstance(self.tiers, list):
+            return ['Ступени — список пар [порог суммы, процент]']
+        errors = []
+        for position, tier in enumerate(self.tiers, 1):
+            try:
+                if not isinstance(tier, (list, tuple)) or len(tier) != 2:
+                    raise ValueError
+                threshold, percent = (self._tier_number(value) for value in tier)
+            except (ValueError, InvalidOperation):
+                errors.append(f'Ступень {position}: нужна пара чисел [порог суммы, процент], получено {tier!r}')
+                continue
+            if threshold < 0:
+                errors.append(f'Ступень {position}: порог не может быть отрицательным')
+            if not 0 <= percent <= 100:
+                errors.append(f'Ступень {position}: процент должен быть от 0 до 100')
+        return errors
+
+    def clean(self):
+        # Движок акций считает каждую корзину: правило, которое он не сможет
+        # скомпилировать или применить, не должно попасть в базу
+        errors = {}
+        tier_errors = self._tier_errors()
+        if tier_errors:
+            errors['tiers'] = tier_errors
+        for field in self.KIND_FIELDS.get(self.kind, ()):
+            if field not in errors and not getattr(self, field):
+                errors[field] = f'Нужно ненулевое значение для акции «{self.get_kind_display()}»'
+        if self.scope in ('category', 'product') and getattr(self, f'{self.scope}_id') is None:
+            errors[self.scope] = f'Укажите {self._meta.get_field(self.scope).verbose_name.lower()} для этой акции'
+        if errors:
+            raise ValidationError(errors)
 
 
 class Order(models.Model):
@@ -275,9 +462,25 @@ class Order(models.Model):
         ('shipping', 'Доставляется'),
         ('delivered', 'Доставлен'),
         ('picked-up', 'Выдан покупателю'),
+        ('returned', 'Возвращён на склад'),
         ('cancelled', 'Отменён'),
     )
 
+    # Статусы, из которых заказ уже никуда не переходит — такие заказы
+    # со временем переносятся в архив (см. pages/archive.py)
+    TERMINAL_STATUSES = ('picked-up', 'returned', 'cancelled')
+
+    # Разрешённые переходы статусов: откуда -> куда
+    ALLOWED_TRANSITIONS = {
+        'pending': ('processing', 'cancelled'),
+        'processing': ('shipping', 'cancelled'),
+        'shipping': ('delivered', 'cancelled'),
+        'delivered': ('picked-up', 'returned'),
+    }
+
+    # Сколько дней заказ хранится в пункте выдачи после доставки
+    STORAGE_DAYS = 7
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -315,13 +518,22 @@ class Order(models.Model):
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='order_status_updated_idx'),
+            models.Index(fields=['status', 'storage_deadline'], name='order_status_deadline_idx'),
+            # Инкрементальный пересчёт витрины продаж (pages/sales.py)
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+            # Сортировка и иерархия дат в админке (pages/admin_mixins.py)
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.order_number:
             self.order_number = f"ORD-{timezone.now().strftime('%Y%m%d')}-{random.randint(1000, 9999)}"
 
         if self.status == 'delivered' and not self.storage_deadline:
-            self.storage_deadline = timezone.now() + timedelta(days=7)
+            self.storage_deadline = timezone.now() + timedelta(days=self.STORAGE_DAYS)
 
         super().save(*args, **kwargs)
 
@@ -353,10 +565,91 @@ class OrderItem(models.Model):
         return self.price * self.quantity
 
 
+class ArchivedOrder(models.Model):
+    """
+    Холодная копия завершённого заказа.
+    Повторяет поля Order (включая id), чтобы история читалась одинаково.
+    """
+    STATUS_CHOICES = Order.STATUS_CHOICES
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='archived_orders',
+        verbose_name='Пользователь'
+    )
+    order_number = models.CharField(max_length=50, unique=True, verbose_name='Номер заказа')
+
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Сумма товаров')
+    delivery_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Стоимость доставки')
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Сумма скидки')
+
+    promo_code = models.ForeignKey(
+        'PromoCode',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Промокод'
+    )
+
+    delivery_city = models.CharField(max_length=100, null=True, blank=True, verbose_name='Город доставки')
+    delivery_distance = models.IntegerField(default=0, verbose_name='Расстояние (км)')
+    pickup_point = models.CharField(max_length=200, blank=True, default="Not specified", verbose_name='Пункт выдачи')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name='Статус')
+    created_at = models.DateTimeField(verbose_name='Дата создания')
+    updated_at = models.DateTimeField(verbose_name='Последнее обновление')
+    storage_deadline = models.DateTimeField(blank=True, null=True, verbose_name='Срок хранения')
+
+    notes = models.TextField(blank=True, verbose_name='Примечания')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')
+
+    class Meta:
+        verbose_name = 'Архивный заказ'
+        verbose_name_plural = 'Архив заказов'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['archived_at'], name='archived_order_archived_idx'),
+            models.Index(fields=['created_at', 'id'], name='archived_order_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Заказ #{self.order_number} (архив) - {self.user.username if self.user else 'Гость'}"
+
+    def get_final_total(self):
+        return self.total_amount + self.delivery_cost - self.discount_amount
+
+    def get_items_count(self):
+        return self.items.aggregate(total=models.Sum('quantity'))['total'] or 0
+
+
+class ArchivedOrderItem(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items', verbose_name='Заказ')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name='Продукт')
+    quantity = models.PositiveIntegerField(default=1, verbose_name='Количество')
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Цена на момент заказа')
+
+    class Meta:
+        verbose_name = 'Позиция архивного заказа'
+        verbose_name_plural = 'Позиции архивных заказов'
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product.name}"
+
+    def get_subtotal(self):
+        return self.price * self.quantity
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, verbose_name='Пользователь')
     nickname = models.CharField(max_length=30, verbose_name='Никнейм')
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='Аватар')
+    avatar = models.ImageField(
+        upload_to='avatars/', storage=blob_storage, blank=True, null=True, verbose_name='Аватар'
+    )
+    # Квадратные WebP 64/128/256 px для шапки и профиля (pages/avatars.py)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Рендиции аватара')
     bio = models.TextField(blank=True, verbose_name='О себе')
     rating = models.FloatField(default=5.0, verbose_name='Рейтинг')
 
@@ -399,6 +692,16 @@ class PromoCodeUsage(models.Model):
         verbose_name='Заказ'
     )
 
+    # Заполняется при переносе заказа в архив вместо order
+    archived_order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='promo_usages',
+        verbose_name='Архивный заказ'
+    )
+
     order_amount = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -428,9 +731,40 @@ class PromoCodeUsage(models.Model):
         verbose_name = 'Использование промокода'
         verbose_name_plural = 'История использования промокодов'
         ordering = ['-used_at']
+        indexes = [
+            models.Index(fields=['used_at', 'id'], name='promo_usage_used_idx'),
+        ]
 
     def __str__(self):
         return f"{self.promo_code.code} - Заказ #{self.order.order_number if self.order else 'N/A'}"
+
+
+class PromoCodeDailyStat(models.Model):
+    """Суточная сводка по промокоду; пополняется при каждом списании (pages/promos.py)."""
+    promo_code = models.ForeignKey(
+        PromoCode,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Промокод'
+    )
+    day = models.DateField(verbose_name='День')
+    redemptions = models.PositiveIntegerField(default=0, verbose_name='Использований')
+    gross_order_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Сумма заказов ($)')
+    total_discount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Сумма скидок ($)')
+
+    class Meta:
+        verbose_name = 'Сводка по промокоду за день'
+        verbose_name_plural = 'Отчёт по промокодам'
+        ordering = ['-day', 'promo_code']
+        constraints = [
+            models.UniqueConstraint(fields=['promo_code', 'day'], name='promo_daily_stat_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='promo_daily_stat_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.promo_code.code} @ {self.day}"
     
 
 
@@ -469,4 +803,131 @@ class UserSettings(models.Model):
         verbose_name_plural = 'Настройки пользователей'
 
     def __str__(self):
-        return f'Настройки {self.user.username}'
\ No newline at end of file
+        return f'Настройки {self.user.username}'
+
+
+class JobRun(models.Model):
+    """Журнал запусков фоновых задач: сколько обработано и за какое время."""
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    started_at = models.DateTimeField(default=timezone.now, verbose_name='Начало')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='Длительность (мс)')
+    processed = models.PositiveIntegerField(default=0, verbose_name='Обработано')
+    success = models.BooleanField(null=True, verbose_name='Успешно')
+    details = models.JSONField(default=dict, blank=True, verbose_name='Детали')
+
+    class Meta:
+        verbose_name = 'Запуск задачи'
+        verbose_name_plural = 'Запуски задач'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['name', '-started_at'], name='jobrun_name_started_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} @ {self.started_at:%d.%m.%Y %H:%M}'
+
+
+class Task(models.Model):
+    """Фоновая задача в очереди на базе (pages/taskqueue.py, manage.py run_worker)."""
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('failed', 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=200, verbose_name='Функция')
+    args = models.JSONField(default=list, blank=True, verbose_name='Аргументы')
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name='Именованные аргументы')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name='Статус')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='Максимум попыток')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Не раньше')
+    # Пока не истекло — задача занята воркером; после — её заберёт другой
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name='Занята до')
+    locked_by = models.CharField(max_length=64, blank=True, verbose_name='Воркер')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_status_run_after_idx'),
+            models.Index(fields=['locked_by'], name='task_locked_by_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.get_status_display()})'
+
+
+class MediaBlob(models.Model):
+    """Файл в хранилище по хешу и число строк, которые на него ссылаются (pages/blobs.py)."""
+    path = models.CharField(max_length=255, unique=True, verbose_name='Путь')
+    size = models.PositiveBigIntegerField(default=0, verbose_name='Размер (байт)')
+    refcount = models.IntegerField(default=0, verbose_name='Ссылок')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создан')
+    # Когда число ссылок последний раз менялось — сборщик ждёт после этого
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменён')
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at'], name='mediablob_refcount_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.path} ({self.refcount})'
+
+
+class DailyOrderFact(models.Model):
+    """Продажи за день по городу доставки; пересчитывается pages/sales.py."""
+    day = models.DateField(verbose_name='День')
+    city = models.CharField(max_length=100, blank=True, verbose_name='Город доставки')
+    orders = models.PositiveIntegerField(default=0, verbose_name='Заказов')
+    items = models.PositiveIntegerField(default=0, verbose_name='Единиц товара')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Выручка по товарам ($)')
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Скидки ($)')
+    delivery_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Доставка ($)')
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+        ordering = ['-day', 'city']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'city'], name='daily_order_fact_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.city or "—"}'
+
+
+class DailyCategoryFact(models.Model):
+    """Продажи категории за день по городу доставки."""
+    day = models.DateField(verbose_name='День')
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_facts',
+        verbose_name='Категория'
+    )
+    city = models.CharField(max_length=100, blank=True, verbose_name='Город доставки')
+    orders = models.PositiveIntegerField(default=0, verbose_name='Заказов с категорией')
+    quantity = models.PositiveIntegerField(default=0, verbose_name='Единиц товара')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Выручка ($)')
+
+    class Meta:
+        verbose_name = 'Продажи категории за день'
+        verbose_name_plural = 'Продажи по категориям'
+        ordering = ['-day', 'category']
+        indexes = [
+            models.Index(fields=['day', 'category'], name='daily_category_fact_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.category_id} {self.city or "—"}'
@@ -0,0 +1,472 @@
+"""
+Промокоды в памяти процесса.
+
+PromoRule — неизменяемый «скомпилированный» снимок PromoCode: проверка
+и расчёт скидки идут без обращений к базе. PromoRegistry держит таблицу
+code -> PromoRule и сбрасывает её, когда меняется версия промокодов
+(после сохранения/удаления PromoCode, см. pages/signals.py и pages/versioning.py).
+"""
+import random
+import string
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from pages.models import PromoCode, PromoCodeDailyStat, PromoCodeUsage
+from pages.versioning import bump_version, current_version
+
+
+PROMO_VERSION_KEY = 'promos:version'
+AVAILABLE_PROMOS_KEY = 'promos:available:{version}'
+AVAILABLE_PROMOS_LIMIT = 10
+AVAILABLE_PROMOS_MAX_TTL = 60 * 60
+
+# Верхняя граница таблицы: массовые одноразовые коды не должны съесть память
+REGISTRY_MAX_ENTRIES = 50000
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+GENERATE_CHUNK_SIZE = 5000
+DUPLICATE_CHUNK_SIZE = 1000
+COPY_SUFFIX_LENGTH = 4
+
+# Коды должны быть неугадываемыми — берём системный генератор
+_code_random = random.SystemRandom()
+
+
+class PromoError(Exception):
+    """Промокод нельзя применить; message показывается клиенту."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@dataclass(frozen=True)
+class PromoRule:
+    id: int
+    code: str
+    discount_type: str
+    discount_percentage: Decimal | None
+    discount_amount: Decimal | None
+    minimum_order_amount: Decimal
+    max_discount_amount: Decimal | None
+    usage_limit: int | None
+    times_used: int
+    valid_from: datetime | None
+    valid_until: datetime | None
+    is_active: bool
+    display: str
+
+    @classmethod
+    def from_model(cls, promo):
+        return cls(
+            id=promo.pk,
+            code=promo.code,
+            discount_type=promo.discount_type,
+            discount_percentage=promo.discount_percentage,
+            discount_amount=promo.discount_amount,
+            minimum_order_amount=promo.minimum_order_amount or Decimal('0'),
+            max_discount_amount=promo.max_discount_amount,
+            usage_limit=promo.usage_limit,
+            times_used=promo.times_used,
+            valid_from=promo.valid_from,
+            valid_until=promo.valid_until,
+            is_active=promo.is_active,
+            display=promo.get_discount_display(),
+        )
+
+    def check(self, now=None):
+        """То же, что PromoCode.is_valid(): (bool, сообщение)."""
+        now = now or timezone.now()
+
+        if not self.is_active:
+            return False, "Промокод неактивен"
+
+        if self.valid_from and now < self.valid_from:
+            return False, "Промокод еще не активен"
+
+        if self.valid_until and now > self.valid_until:
+            return False, "Промокод истек"
+
+        if self.usage_limit and self.times_used >= self.usage_limit:
+            return False, "Промокод уже использован максимальное количество раз"
+
+        return True, "Промокод действителен"
+
+    def calculate(self, order_amount, delivery_cost=Decimal('0')):
+        """То же, что PromoCode.calculate_discount(), но принимает только Decimal."""
+        if order_amount < self.minimum_order_amount:
+            return Decimal('0'), False, f"Минимальная сумма заказа: ${self.minimum_order_amount}"
+
+        discount_amount = Decimal('0')
+        free_shipping = False
+
+        if self.discount_type == 'percentage':
+            discount_amount = (order_amount * self.discount_percentage) / Decimal('100')
+
+            if self.max_discount_amount and discount_amount > self.max_discount_amount:
+                discount_amount = self.max_discount_amount
+
+            message = f"Скидка {self.discount_percentage}%"
+            if self.max_discount_amount:
+                message += f" (макс. ${self.max_discount_amount})"
+
+        elif self.discount_type == 'fixed':
+            discount_amount = min(self.discount_amount, order_amount)
+            message = f"Скидка ${self.discount_amount}"
+
+        elif self.discount_type == 'free_shipping':
+            free_shipping = True
+            message = "Бесплатная доставка"
+
+        else:
+            message = "Неверный тип скидки"
+
+        return discount_amount, free_shipping, message
+
+
+@dataclass(frozen=True)
+class PromoQuote:
+    rule: PromoRule
+    order_amount: Decimal
+    delivery_cost: Decimal
+    discount_amount: Decimal
+    free_shipping: bool
+    message: str
+
+    @property
+    def final_amount(self):
+        return self.order_amount - self.discount_amount + (0 if self.free_shipping else self.delivery_cost)
+
+
+def promo_version():
+    """Текущая версия промокодов; меняется через invalidate_promos()."""
+    return current_version(PROMO_VERSION_KEY)
+
+
+class PromoRegistry:
+    """Таблица code -> PromoRule, заполняется лениво и сбрасывается по версии."""
+
+    # Отметка «такого кода нет» — чтобы перебор несуществующих кодов не ходил в базу
+    MISSING = object()
+
+    def __init__(self):
+        self._version = None
+        self._table = {}
+        self._lock = threading.Lock()
+
+    def _current_table(self):
+        version = promo_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._table = {}
+                    self._version = version
+        return self._table
+
+    def get(self, code):
+        """PromoRule по коду или None. В базу — только при первом обращении к коду."""
+        table = self._current_table()
+        rule = table.get(code)
+        if rule is None:
+            promo = PromoCode.objects.filter(code=code).first()
+            rule = PromoRule.from_model(promo) if promo else self.MISSING
+            if len(table) >= REGISTRY_MAX_ENTRIES:
+                table.clear()
+            # Пишем в таблицу, снятую до запроса: если версия сменилась, запись уйдёт вместе со старой
+            table[code] = rule
+        return None if rule is self.MISSING else rule
+
+
+registry = PromoRegistry()
+
+
+def invalidate_promos():
+    """Сбросить таблицы промокодов во всех процессах (после коммита транзакции)."""
+    bump_version(PROMO_VERSION_KEY)
+
+
+def available_promos(now=None):
+    """
+    Публичные действующие промокоды для корзины (до AVAILABLE_PROMOS_LIMIT).
+
+    Список лежит в кэше под ключом с версией промокодов, так что любое
+    изменение PromoCode или исчерпание лимита его сбрасывает. Срок жизни —
+    до ближайшей границы valid_from / valid_until, когда список и так меняется.
+    """
+    now = now or timezone.now()
+    key = AVAILABLE_PROMOS_KEY.format(version=promo_version())
+    promos = cache.get(key)
+    if promos is not None:
+        return promos
+
+    public = PromoCode.objects.filter(is_active=True, generated_by__isnull=True)
+    promos = list(
+        public.filter(
+            Q(valid_from__lte=now) | Q(valid_from__isnull=True)
+        ).filter(
+            Q(valid_until__gte=now) | Q(valid_until__isnull=True)
+        ).exclude(
+            usage_limit__isnull=False,
+            times_used__gte=F('usage_limit')
+        ).order_by('-created_at')[:AVAILABLE_PROMOS_LIMIT]
+    )
+
+    boundaries = public.aggregate(
+        next_start=Min('valid_from', filter=Q(valid_from__gt=now)),
+        next_end=Min('valid_until', filter=Q(valid_until__gte=now)),
+    )
+    timeout = AVAILABLE_PROMOS_MAX_TTL
+    for boundary in boundaries.values():
+        if boundary is not None:
+            timeout = min(timeout, (boundary - now).total_seconds() + 1)
+    cache.set(key, promos, max(int(timeout), 1))
+    return promos
+
+
+def parse_amount(value):
+    """Сумма из JSON/формы в Decimal; PromoError при мусоре."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        raise PromoError('Неверная сумма заказа')
+    if not amount.is_finite():
+        raise PromoError('Неверная сумма заказа')
+    return amount
+
+
+def quote_promo(code, order_amount, delivery_cost=Decimal('0'), now=None):
+    """
+    Проверяет промокод и считает скидку без обращений к базе (кроме первого
+    обращения к коду в процессе). Бросает PromoError, если применить нельзя.
+    """
+    if not code:
+        raise PromoError('Введите промокод')
+    if order_amount <= 0:
+        raise PromoError('Неверная сумма заказа')
+
+    rule = registry.get(code)
+    if rule is None:
+        raise PromoError('Промокод не найден', status=404)
+
+    is_valid, message = rule.check(now)
+    if not is_valid:
+        raise PromoError(message)
+
+    discount_amount, free_shipping, message = rule.calculate(order_amount, delivery_cost)
+    if discount_amount == 0 and not free_shipping:
+        raise PromoError(message)
+
+    return PromoQuote(
+        rule=rule,
+        order_amount=order_amount,
+        delivery_cost=delivery_cost,
+        discount_amount=discount_amount,
+        free_shipping=free_shipping,
+        message=message,
+    )
+
+
+def redeem_promo(promo_id, order, order_amount, discount_amount, user=None):
+    """
+    Списывает одно использование промокода и пишет PromoCodeUsage.
+
+    Вызывается внутри транзакции оформления заказа: условный UPDATE
+    (usage_limit IS NULL OR times_used < usage_limit) и INSERT истории
+    фиксируются или откатываются вместе с заказом. Бросает PromoError,
+    если лимит исчерпан или промокод выключен.
+    """
+    with transaction.atomic():
+        promo = PromoCode(pk=promo_id)
+        if not promo.use():
+            raise PromoError('Промокод уже использован максимальное количество раз')
+
+        usage = PromoCodeUsage.objects.create(
+            promo_code_id=promo_id,
+            order=order,
+            order_amount=order_amount,
+            discount_amount=discount_amount,
+            user=user,
+        )
+        record_daily_stat(promo_id, timezone.localdate(usage.used_at), order_amount, discount_amount)
+
+        # Лимит выбран — таблицы промокодов в памяти должны это увидеть
+        if promo.usage_limit and promo.times_used >= promo.usage_limit:
+            invalidate_promos()
+    return usage
+
+
+def unique_codes(count, length=8, prefix='', chunk_size=GENERATE_CHUNK_SIZE):
+    """
+    Генерирует count ещё не занятых кодов, отдавая их списками до chunk_size.
+
+    Кандидаты набираются в памяти, а коллизии с базой проверяются одним
+    запросом code IN (...) на весь кусок вместо exists() на каждый код.
+    """
+    produced = set()
+    while len(produced) < count:
+        need = min(chunk_size, count - len(produced))
+        candidates = set()
+        while len(candidates) < need:
+            code = prefix + ''.join(_code_random.choices(CODE_ALPHABET, k=length))
+            if code not in produced:
+                candidates.add(code)
+        taken = set(PromoCode.objects.filter(code__in=candidates).values_list('code', flat=True))
+        fresh = list(candidates - taken)
+        produced.update(fresh)
+        if fresh:
+            yield fresh
+
+
+def generate_promo_codes(template, count, chunk_size=GENERATE_CHUNK_SIZE, progress=None):
+    """
+    Создаёт count промокодов по шаблону PromoCodeRandomizer.
+
+    Пишет через bulk_create(ignore_conflicts=True) кусками по chunk_size:
+    если параллельный процесс успел занять код между проверкой и вставкой,
+    строка молча пропускается. Поэтому после каждого куска вставленные
+    строки пересчитываются (у них общий шаблон и valid_from этого запуска),
+    а недостачу добирает следующий круг. progress(created, count)
+    вызывается после каждого куска. Возвращает число созданных кодов.
+    """
+    valid_from = timezone.now()
+    valid_until = valid_from + timedelta(days=template.valid_days)
+    mine = PromoCode.objects.filter(generated_by=template, valid_from=valid_from)
+    created = 0
+    while created < count:
+        for codes in unique_codes(count - created, template.code_length, template.code_prefix.upper(), chunk_size):
+            with transaction.atomic():
+                PromoCode.objects.bulk_create(
+                    [template.build_code(code, valid_from, valid_until) for code in codes],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
+                created += mine.filter(code__in=codes).count()
+            if progress:
+                progress(created, count)
+
+    # Коды, которые кто-то уже пробовал, могли попасть в реестр как «не найден»
+    invalidate_promos()
+    return created
+
+
+def _copy_code(code, max_length):
+    suffix = '-' + ''.join(_code_random.choices(CODE_ALPHABET, k=COPY_SUFFIX_LENGTH))
+    return code[:max_length - len(suffix)] + suffix
+
+
+def _insert_copies(promos):
+    """Подбирает копиям свободные коды (один IN-запрос на попытку) и вставляет их."""
+    max_length = PromoCode._meta.get_field('code').max_length
+    pending = list(promos)
+    copies = []
+    used = set()
+    while pending:
+        candidates = {}
+        for promo in pending:
+            code = _copy_code(promo.code, max_length)
+            while code in candidates or code in used:
+                code = _copy_code(promo.code, max_length)
+            candidates[code] = promo
+        taken = set(PromoCode.objects.filter(code__in=candidates).values_list('code', flat=True))
+        pending = []
+        for code, promo in candidates.items():
+            if code in taken:
+                pending.append(promo)
+                continue
+            used.add(code)
+            promo.pk = None
+            promo._state.adding = True
+            promo.code = code
+            promo.times_used = 0
+            copies.append(promo)
+    # ignore_conflicts молча пропускает коды, занятые после проверки, —
+    # вставленные считаются по разнице до и после, а не по длине списка
+    existing = PromoCode.objects.filter(code__in=[promo.code for promo in copies])
+    with transaction.atomic():
+        before = existing.count()
+        PromoCode.objects.bulk_create(copies, batch_size=1000, ignore_conflicts=True)
+        return existing.count() - before
+
+
+def duplicate_promo_codes(queryset, chunk_size=DUPLICATE_CHUNK_SIZE, progress=None):
+    """
+    Копирует промокоды из queryset с новыми кодами вида CODE-X7K2.
+
+    Ключи исходников забираются заранее: копии могут подходить под тот же
+    фильтр, а курсор SQLite видит строки, вставленные по ходу чтения.
+    Дальше — кусками по chunk_size: одна выборка и один bulk_create на
+    кусок, без save() на каждую строку. Счётчик использований у копий
+    обнулён. progress(done, total) вызывается после каждого куска.
+    """
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    done = 0
+    for start in range(0, len(pks), chunk_size):
+        done += _insert_copies(PromoCode.objects.filter(pk__in=pks[start:start + chunk_size]))
+        if progress:
+            progress(done, len(pks))
+
+    invalidate_promos()
+    return done
+
+
+def record_daily_stat(promo_id, day, order_amount, discount_amount):
+    """Прибавляет одно использование к суточной сводке (UPDATE, а при отсутствии строки — INSERT)."""
+    increments = {
+        'redemptions': F('redemptions') + 1,
+        'gross_order_amount': F('gross_order_amount') + order_amount,
+        'total_discount': F('total_discount') + discount_amount,
+    }
+    stats = PromoCodeDailyStat.objects.filter(promo_code_id=promo_id, day=day)
+    if stats.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            PromoCodeDailyStat.objects.create(
+                promo_code_id=promo_id,
+                day=day,
+                redemptions=1,
+                gross_order_amount=order_amount,
+                total_discount=discount_amount,
+            )
+    except IntegrityError:
+        # Строку за этот день успел создать параллельный заказ
+        stats.update(**increments)
+
+
+def rebuild_daily_stats(since=None, until=None):
+    """
+    Пересчитывает сводки из сырого журнала PromoCodeUsage за дни [since, until].
+    Нужна для заполнения истории и сверки; в обычной работе сводки
+    пополняются из redeem_promo. Возвращает число записанных строк.
+    """
+    usages = PromoCodeUsage.objects.annotate(day=TruncDate('used_at'))
+    stats = PromoCodeDailyStat.objects.all()
+    if since:
+        usages = usages.filter(day__gte=since)
+        stats = stats.filter(day__gte=since)
+    if until:
+        usages = usages.filter(day__lte=until)
+        stats = stats.filter(day__lte=until)
+
+    rows = usages.values('promo_code_id', 'day').annotate(
+        redemptions=Count('id'),
+        gross_order_amount=Sum('order_amount'),
+        total_discount=Sum('discount_amount'),
+    ).order_by()
+
+    with transaction.atomic():
+        stats.delete()
+        created = PromoCodeDailyStat.objects.bulk_create(
+            [PromoCodeDailyStat(**row) for row in rows.iterator(chunk_size=2000)],
+            batch_size=1000,
+        )
+    return len(created)
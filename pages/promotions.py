@@ -0,0 +1,267 @@
+"""
+Движок автоматических акций (PromotionRule).
+
+Активные правила один раз на версию компилируются в неизменяемые
+CompiledRule и раскладываются по индексам: товар / категория / все товары.
+Корзина считается за один проход по позициям без запросов к базе:
+для позиции берутся только правила её товара, её категории и общие,
+в порядке приоритета. Ступенчатые (tiered) правила копят сумму своих
+позиций по ходу прохода и применяются к корзине в конце.
+"""
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from pages.models import PromotionRule
+from pages.versioning import bump_version, current_version
+
+
+logger = logging.getLogger(__name__)
+
+PROMOTIONS_VERSION_KEY = 'promotions:version'
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@dataclass(frozen=True)
+class CartLine:
+    product_id: int
+    category_id: int | None
+    quantity: int
+    unit_price: Decimal
+
+    @classmethod
+    def from_cart_item(cls, item):
+        """Из CartItem с уже подгруженным product (select_related)."""
+        return cls(item.product_id, item.product.category_id, item.quantity, item.product.price)
+
+    @property
+    def total(self):
+        return self.unit_price * self.quantity
+
+
+@dataclass(frozen=True)
+class AppliedPromotion:
+    rule_id: int
+    name: str
+    amount: Decimal
+    description: str
+    product_id: int | None = None
+
+
+@dataclass(frozen=True)
+class PromotionResult:
+    subtotal: Decimal
+    discount: Decimal
+    applied: tuple
+
+    @property
+    def total(self):
+        return self.subtotal - self.discount
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    name: str
+    kind: str
+    priority: int
+    stackable: bool
+    rate: Decimal
+    amount: Decimal
+    buy_quantity: int
+    get_quantity: int
+    tiers: tuple
+    valid_from: datetime | None
+    valid_until: datetime | None
+
+    @classmethod
+    def from_model(cls, rule):
+        return cls(
+            id=rule.pk,
+            name=rule.name,
+            kind=rule.kind,
+            priority=rule.priority,
+            stackable=rule.stackable,
+            rate=(rule.percentage or ZERO) / 100,
+            amount=rule.amount or ZERO,
+            buy_quantity=rule.buy_quantity or 0,
+            get_quantity=rule.get_quantity or 0,
+            # Ступени по убыванию порога: первая подходящая — лучшая
+            tiers=tuple(sorted(
+                ((Decimal(str(threshold)), Decimal(str(percent)) / 100) for threshold, percent in rule.tiers),
+                reverse=True,
+            )),
+            valid_from=rule.valid_from,
+            valid_until=rule.valid_until,
+        )
+
+    @property
+    def sort_key(self):
+        return -self.priority, self.id
+
+    def active_at(self, now):
+        return (self.valid_from is None or self.valid_from <= now) and \
+               (self.valid_until is None or now <= self.valid_until)
+
+    def line_discount(self, line, remaining):
+        """Скидка на позицию (не больше remaining) и пояснение."""
+        if self.kind == 'percentage':
+            discount = line.total * self.rate
+            description = f'-{self.rate * 100:g}%'
+        elif self.kind == 'fixed':
+            discount = self.amount * line.quantity
+            description = f'-${self.amount} за шт.'
+        elif self.kind == 'buy_x_get_y':
+            bundle = self.buy_quantity + self.get_quantity
+            if not self.buy_quantity or not self.get_quantity or line.quantity < bundle:
+                return ZERO, ''
+            free_units = (line.quantity // bundle) * self.get_quantity
+            discount = line.unit_price * free_units
+            description = f'{self.buy_quantity}+{self.get_quantity}: {free_units} шт. бесплатно'
+        else:
+            return ZERO, ''
+        return min(_money(discount), remaining), description
+
+    def tier_discount(self, base):
+        for threshold, rate in self.tiers:
+            if base >= threshold:
+                return _money(base * rate), f'от ${threshold}: -{rate * 100:g}%'
+        return ZERO, ''
+
+
+class RuleSet:
+    """Скомпилированный набор правил с индексами по товару и категории."""
+
+    def __init__(self, rules):
+        self.by_product = defaultdict(list)
+        self.by_category = defaultdict(list)
+        self.general = []
+        self.size = 0
+        for rule, scope, target_id in rules:
+            self.size += 1
+            if scope == 'product':
+                self.by_product[target_id].append(rule)
+            elif scope == 'category':
+                self.by_category[target_id].append(rule)
+            else:
+                self.general.append(rule)
+        for bucket in (*self.by_product.values(), *self.by_category.values(), self.general):
+            bucket.sort(key=lambda rule: rule.sort_key)
+
+    @classmethod
+    def compile(cls, now=None):
+        """Загружает активные (и ещё не истёкшие) правила одним запросом."""
+        now = now or timezone.now()
+        queryset = PromotionRule.objects.filter(is_active=True).filter(
+            Q(valid_until__isnull=True) | Q(valid_until__gte=now)
+        )
+        rules = []
+        for rule in queryset:
+            target_id = rule.product_id if rule.scope == 'product' else \
+                rule.category_id if rule.scope == 'category' else None
+            try:
+                compiled = CompiledRule.from_model(rule)
+            except (TypeError, ValueError, ArithmeticError):
+                # Битое правило (например, ступени в обход PromotionRule.clean)
+                # не должно ронять каждую корзину — пропускаем его
+                logger.exception('Акция #%s «%s» не скомпилирована и пропущена', rule.pk, rule.name)
+                continue
+            rules.append((compiled, rule.scope, target_id))
+        return cls(rules)
+
+    def _rules_for(self, line):
+        return heapq.merge(
+            self.by_product.get(line.product_id, ()),
+            self.by_category.get(line.category_id, ()) if line.category_id else (),
+            self.general,
+            key=lambda rule: rule.sort_key,
+        )
+
+    def evaluate(self, lines, now=None):
+        now = now or timezone.now()
+        subtotal = ZERO
+        discount = ZERO
+        applied = []
+        tier_bases = {}
+
+        for line in lines:
+            line_total = line.total
+            subtotal += line_total
+            remaining = line_total
+            tiered = []
+            blocked = False
+
+            for rule in self._rules_for(line):
+                if not rule.active_at(now):
+                    continue
+                if rule.kind == 'tiered':
+                    tiered.append(rule)
+                    continue
+                if blocked or remaining <= 0:
+                    continue
+                amount, description = rule.line_discount(line, remaining)
+                if amount > 0:
+                    remaining -= amount
+                    applied.append(AppliedPromotion(rule.id, rule.name, amount, description, line.product_id))
+                    blocked = not rule.stackable
+
+            discount += line_total - remaining
+            for rule in tiered:
+                tier_bases[rule] = tier_bases.get(rule, ZERO) + remaining
+
+        # Ступенчатые скидки — на сумму своих позиций после построчных скидок
+        for rule in sorted(tier_bases, key=lambda rule: rule.sort_key):
+            amount, description = rule.tier_discount(tier_bases[rule])
+            amount = min(amount, subtotal - discount)
+            if amount > 0:
+                discount += amount
+                applied.append(AppliedPromotion(rule.id, rule.name, amount, description))
+                if not rule.stackable:
+                    break
+
+        return PromotionResult(subtotal=subtotal, discount=discount, applied=tuple(applied))
+
+
+class _RuleSetCache:
+    def __init__(self):
+        self._version = None
+        self._ruleset = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = current_version(PROMOTIONS_VERSION_KEY)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._ruleset = RuleSet.compile()
+                    self._version = version
+        return self._ruleset
+
+
+_rulesets = _RuleSetCache()
+
+
+def active_ruleset():
+    return _rulesets.get()
+
+
+def invalidate_promotions():
+    bump_version(PROMOTIONS_VERSION_KEY)
+
+
+def evaluate_cart(cart_items, now=None):
+    """Акции для корзины из CartItem (product должен быть подгружен)."""
+    lines = [CartLine.from_cart_item(item) for item in cart_items]
+    return active_ruleset().evaluate(lines, now)
@@ -0,0 +1,105 @@
+"""
+Ограничение частоты запросов к JSON-эндпоинтам (token bucket в django cache).
+
+    @rate_limit('10/m', burst=5)
+    def apply_promo_code(request): ...
+
+Корзины ведутся отдельно по IP и по сессии (или пользователю). Проверка
+стоит до любой работы с ORM и отвечает дешёвым 429 с Retry-After.
+Чтение и запись корзины не атомарны: при одновременных запросах лимит
+может быть превышен на единицы — для защиты от перебора этого достаточно.
+При нескольких процессах нужен общий бэкенд кэша.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): число запросов за период в секундах."""
+    count, _, unit = rate.partition('/')
+    return int(count), RATE_UNITS[unit[0]]
+
+
+def client_ip(request):
+    if getattr(settings, 'RATELIMIT_TRUST_FORWARDED', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identities(request, keys):
+    identities = []
+    if 'ip' in keys:
+        identities.append(f'ip:{client_ip(request)}')
+    if 'session' in keys:
+        # session_key берётся из cookie без загрузки сессии из базы
+        session = getattr(request, 'session', None)
+        if session is not None and session.session_key:
+            identities.append(f'session:{session.session_key}')
+    return identities
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        # Полная корзина неотличима от отсутствующей — дольше хранить незачем
+        self.ttl = math.ceil(capacity / refill_per_second) + 1
+
+    def consume(self, cache_keys, now=None):
+        """
+        Берёт по жетону из каждой корзины. Возвращает 0, если можно
+        пропустить запрос, иначе — через сколько секунд повторить.
+        """
+        now = now if now is not None else time.time()
+        states = cache.get_many(cache_keys)
+        updated = {}
+        retry_after = 0.0
+        for key in cache_keys:
+            tokens, last = states.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + max(0.0, now - last) * self.refill_per_second)
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / self.refill_per_second)
+            updated[key] = (tokens, now)
+        if retry_after:
+            return retry_after
+        cache.set_many({key: (tokens - 1, now) for key, (tokens, now) in updated.items()}, self.ttl)
+        return 0
+
+
+def rate_limit(rate, burst=None, keys=('ip', 'session'), scope=None):
+    """
+    Декоратор view: не больше rate (например '10/m') в среднем и burst подряд.
+    Ставится над остальными декораторами, чтобы отсекать запросы до ORM.
+    """
+    count, period = parse_rate(rate)
+    bucket = TokenBucket(burst or count, count / period)
+
+    def decorator(view):
+        prefix = f'rl:{scope or view.__name__}:'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if getattr(settings, 'RATELIMIT_ENABLED', True):
+                cache_keys = [prefix + identity for identity in _identities(request, keys)]
+                retry_after = bucket.consume(cache_keys) if cache_keys else 0
+                if retry_after:
+                    message = 'Слишком много запросов, попробуйте позже'
+                    # Фронтенд промокодов читает message, настроек — error
+                    response = JsonResponse(
+                        {'success': False, 'message': message, 'error': message}, status=429
+                    )
+                    response['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
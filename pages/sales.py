@@ -0,0 +1,203 @@
+"""
+Витрина продаж для дашборда в админке (DailyOrderFact, DailyCategoryFact).
+
+Факты пересчитываются целыми днями. Задача берёт водяной знак прошлого
+успешного запуска, находит заказы, изменённые после него (updated_at у
+горячих, archived_at у архивных), и пересобирает только дни их создания —
+сразу из горячих и архивных таблиц. Пересчёт дня идемпотентен, поэтому
+знак ставится с запасом назад: заказ, закоммиченный позже своего
+updated_at, попадёт в следующий запуск.
+
+Удалённые заказы (не архивированные, а стёртые из базы) следа не
+оставляют — инкрементальный запуск их не увидит. После ручного удаления
+заказов нужен полный пересчёт: manage.py refresh_sales_facts --full.
+Он не очищает витрину заранее: дни пересобираются на месте, а факты за
+дни, где заказов не осталось, удаляются последней транзакцией.
+
+Дашборд читает только факты за выбранный период — время загрузки не
+зависит от размера истории заказов.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from pages.models import (
+    ArchivedOrder, ArchivedOrderItem, DailyCategoryFact, DailyOrderFact, JobRun, Order, OrderItem,
+)
+
+
+SALES_JOB_NAME = 'refresh_sales_facts'
+WATERMARK_OVERLAP = timedelta(minutes=10)
+DAYS_PER_TRANSACTION = 31
+# Отменённые и возвращённые заказы в продажи не входят
+EXCLUDED_STATUSES = ('cancelled', 'returned')
+
+# (модель заказа, модель позиции, поле «когда изменился»)
+SOURCES = (
+    (Order, OrderItem, 'updated_at'),
+    (ArchivedOrder, ArchivedOrderItem, 'archived_at'),
+)
+
+ZERO = Decimal('0')
+
+
+def last_watermark():
+    run = JobRun.objects.filter(name=SALES_JOB_NAME, success=True).order_by('-started_at').first()
+    value = run.details.get('watermark') if run else None
+    return datetime.fromisoformat(value) if value else None
+
+
+def changed_days(since=None):
+    """Дни создания заказов, изменившихся после since (все дни — если since не задан)."""
+    days = set()
+    for order_model, _, changed_field in SOURCES:
+        orders = order_model.objects.all()
+        if since is not None:
+            orders = orders.filter(**{f'{changed_field}__gt': since})
+        days.update(
+            orders.annotate(day=TruncDate('created_at')).order_by().values_list('day', flat=True).distinct()
+        )
+    return sorted(days)
+
+
+def _day_range(days):
+    start = timezone.make_aware(datetime.combine(days[0], time.min))
+    end = timezone.make_aware(datetime.combine(days[-1] + timedelta(days=1), time.min))
+    return start, end
+
+
+def _aggregate(days):
+    """Свежие агрегаты за дни из обеих пар таблиц: {(day, city)} и {(day, category, city)}."""
+    start, end = _day_range(days)
+    order_facts = defaultdict(lambda: {'orders': 0, 'items': 0, 'revenue': ZERO, 'discount': ZERO, 'delivery_cost': ZERO})
+    category_facts = defaultdict(lambda: {'orders': 0, 'quantity': 0, 'revenue': ZERO})
+
+    for order_model, item_model, _ in SOURCES:
+        orders = (
+            order_model.objects
+            .filter(created_at__gte=start, created_at__lt=end)
+            .exclude(status__in=EXCLUDED_STATUSES)
+            .annotate(day=TruncDate('created_at'))
+            .filter(day__in=days)
+            .order_by()
+            .values('day', 'delivery_city')
+            .annotate(
+                orders=Count('id'),
+                revenue=Sum('total_amount'),
+                discount=Sum('discount_amount'),
+                delivery=Sum('delivery_cost'),
+            )
+        )
+        for row in orders:
+            fact = order_facts[row['day'], row['delivery_city'] or '']
+            fact['orders'] += row['orders']
+            fact['revenue'] += row['revenue'] or ZERO
+            fact['discount'] += row['discount'] or ZERO
+            fact['delivery_cost'] += row['delivery'] or ZERO
+
+        items = (
+            item_model.objects
+            .filter(order__created_at__gte=start, order__created_at__lt=end)
+            .exclude(order__status__in=EXCLUDED_STATUSES)
+            .annotate(day=TruncDate('order__created_at'))
+            .filter(day__in=days)
+            .order_by()
+            .values('day', 'order__delivery_city', 'product__category')
+            .annotate(
+                orders=Count('order', distinct=True),
+                units=Sum('quantity'),
+                amount=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            )
+        )
+        for row in items:
+            city = row['order__delivery_city'] or ''
+            fact = category_facts[row['day'], row['product__category'], city]
+            fact['orders'] += row['orders']
+            fact['quantity'] += row['units'] or 0
+            fact['revenue'] += row['amount'] or ZERO
+            order_facts[row['day'], city]['items'] += row['units'] or 0
+
+    return order_facts, category_facts
+
+
+def _prune_facts(keep):
+    """Удаляет факты за дни, которых нет в keep: заказов за них больше нет."""
+    keep = set(keep)
+    for model in (DailyOrderFact, DailyCategoryFact):
+        stale = sorted(set(model.objects.values_list('day', flat=True).distinct()) - keep)
+        for start in range(0, len(stale), DAYS_PER_TRANSACTION):
+            model.objects.filter(day__in=stale[start:start + DAYS_PER_TRANSACTION]).delete()
+
+
+def rebuild_days(days, keep=None):
+    """
+    Заменяет факты за дни days свежими агрегатами (в одной транзакции).
+    С keep в той же транзакции удаляются факты за дни не из keep.
+    """
+    order_facts, category_facts = _aggregate(days) if days else ({}, {})
+    with transaction.atomic():
+        if keep is not None:
+            _prune_facts(keep)
+        DailyOrderFact.objects.filter(day__in=days).delete()
+        DailyCategoryFact.objects.filter(day__in=days).delete()
+        DailyOrderFact.objects.bulk_create([
+            DailyOrderFact(day=day, city=city, **values) for (day, city), values in order_facts.items()
+        ])
+        DailyCategoryFact.objects.bulk_create([
+            DailyCategoryFact(day=day, category_id=category_id, city=city, **values)
+            for (day, category_id, city), values in category_facts.items()
+        ])
+
+
+def refresh_sales_facts(full=False):
+    """
+    Пересчитывает дни, затронутые изменениями после прошлого запуска
+    (full — всю историю). Возвращает (число дней, новый водяной знак).
+    """
+    watermark = timezone.now() - WATERMARK_OVERLAP
+    since = None if full else last_watermark()
+    days = changed_days(since)
+    chunks = [days[start:start + DAYS_PER_TRANSACTION] for start in range(0, len(days), DAYS_PER_TRANSACTION)]
+    if full:
+        # Витрина не пустеет на время пересчёта: лишние дни уходят вместе с последней пачкой
+        chunks = chunks or [[]]
+    for index, chunk in enumerate(chunks):
+        rebuild_days(chunk, keep=days if full and index == len(chunks) - 1 else None)
+    return len(days), watermark
+
+
+def dashboard(days=30, today=None):
+    """Данные дашборда за последние days дней — только из таблиц фактов."""
+    today = today or timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    order_facts = DailyOrderFact.objects.filter(day__gte=since)
+    sums = {
+        'orders': Sum('orders'),
+        'items': Sum('items'),
+        'revenue': Sum('revenue'),
+        'discount': Sum('discount'),
+        'delivery_cost': Sum('delivery_cost'),
+    }
+    by_day = list(order_facts.order_by('day').values('day').annotate(**sums))
+    peak = max((row['revenue'] for row in by_day), default=ZERO) or 1
+    for row in by_day:
+        row['bar'] = int(row['revenue'] * 100 / peak)
+    return {
+        'since': since,
+        'days': days,
+        'totals': order_facts.aggregate(**sums),
+        'by_day': by_day,
+        'by_city': list(order_facts.order_by().values('city').annotate(**sums).order_by('-revenue')[:15]),
+        'by_category': list(
+            DailyCategoryFact.objects.filter(day__gte=since).order_by()
+            .values('category__name')
+            .annotate(orders=Sum('orders'), quantity=Sum('quantity'), revenue=Sum('revenue'))
+            .order_by('-revenue')[:15]
+        ),
+        'last_refresh': JobRun.objects.filter(name=SALES_JOB_NAME, success=True).order_by('-started_at').first(),
+    }
@@ -0,0 +1,80 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from pages import blobs
+from pages.avatars import invalidate_avatar, needs_avatar_renditions, refresh_avatar_task
+from pages.images import delete_files_task, needs_renditions, refresh_renditions_task, rendition_files
+from pages.models import Category, Product, Profile, PromoCode, PromotionRule
+from pages.promos import invalidate_promos
+from pages.promotions import invalidate_promotions
+from pages.sqlite import configure_connection
+
+
+@receiver(post_save, sender=PromoCode)
+@receiver(post_delete, sender=PromoCode)
+def promo_code_changed(sender, **kwargs):
+    invalidate_promos()
+
+
+@receiver(post_save, sender=PromotionRule)
+@receiver(post_delete, sender=PromotionRule)
+def promotion_rule_changed(sender, **kwargs):
+    invalidate_promotions()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def image_saved(sender, instance, **kwargs):
+    # Задача коммитится вместе с записью; ресайз идёт в воркере, не в запросе
+    if needs_renditions(instance):
+        refresh_renditions_task.enqueue(instance._meta.label_lower, instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def image_deleted(sender, instance, **kwargs):
+    files = rendition_files(instance.renditions)
+    if files:
+        delete_files_task.enqueue(files)
+
+
+@receiver(post_save, sender=Profile)
+def avatar_saved(sender, instance, **kwargs):
+    invalidate_avatar(instance.user_id)
+    if needs_avatar_renditions(instance):
+        refresh_avatar_task.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Profile)
+def avatar_deleted(sender, instance, **kwargs):
+    invalidate_avatar(instance.user_id)
+    files = rendition_files(instance.avatar_renditions)
+    if files:
+        delete_files_task.enqueue(files)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Profile)
+def media_before_save(sender, instance, update_fields=None, **kwargs):
+    blobs.remember_files(sender, instance, update_fields)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Profile)
+def media_saved(sender, instance, **kwargs):
+    blobs.files_saved(sender, instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Profile)
+def media_deleted(sender, instance, **kwargs):
+    blobs.files_released(sender, instance)
+
+
+@receiver(connection_created)
+def database_connected(sender, connection, **kwargs):
+    configure_connection(connection)
@@ -0,0 +1,46 @@
+"""
+Прагмы SQLite для каждого нового соединения.
+
+Большинство прагм действуют только на текущее соединение, поэтому их
+ставит обработчик connection_created (pages/signals.py), а значения
+берутся из settings.SQLITE_PRAGMAS (профиль — в config/database.py).
+journal_mode=wal сохраняется в самом файле базы: после первого запуска
+он остаётся включённым и для sqlite3 из консоли.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+# busy_timeout — первым: смена journal_mode ждёт чужие блокировки
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+# Значение подставляется в текст PRAGMA — только числа и слова
+VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(raw_connection, pragmas):
+    """Выполняет PRAGMA из словаря на соединении sqlite3 — в порядке PRAGMA_ORDER."""
+    unknown = set(pragmas) - set(PRAGMA_ORDER)
+    if unknown:
+        raise ImproperlyConfigured(f'SQLITE_PRAGMAS: неизвестные прагмы {", ".join(sorted(unknown))}')
+    for name in PRAGMA_ORDER:
+        if name not in pragmas:
+            continue
+        value = str(pragmas[name])
+        if not VALUE_RE.match(value):
+            raise ImproperlyConfigured(f'SQLITE_PRAGMAS: недопустимое значение {name}={value}')
+        raw_connection.execute(f'PRAGMA {name} = {value}')
+
+
+def current_pragmas(raw_connection):
+    """Фактические значения прагм соединения — для отчётов и проверки настроек."""
+    return {name: raw_connection.execute(f'PRAGMA {name}').fetchone()[0] for name in PRAGMA_ORDER}
+
+
+def configure_connection(connection):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if pragmas:
+        apply_pragmas(connection.connection, pragmas)
@@ -0,0 +1,78 @@
+"""
+Хранилище медиа по хешу содержимого (Product.image, Category.image, Profile.avatar).
+
+Файл сохраняется под именем blobs/ab/cd/<sha256>.<ext>: одинаковые
+загрузки — один файл на диске, а URL никогда не меняет содержимое и
+кэшируется навсегда (pages/media.py отдаёт его с Cache-Control immutable).
+Имя, которое прислал пользователь, и upload_to поля на путь не влияют,
+кроме расширения.
+
+Хранилище лежит в том же MEDIA_ROOT, поэтому старые имена вида
+products/x.jpg продолжают открываться; перевести их в blobs/ —
+manage.py migrate_media_blobs. Сколько строк ссылается на каждый файл,
+учитывает MediaBlob (pages/blobs.py), удаляет ненужные — gc_media_blobs.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+
+BLOB_PREFIX = 'blobs/'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    prefix = BLOB_PREFIX
+
+    def blob_name(self, digest, extension):
+        return f'{self.prefix}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(self.prefix)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        blob_name = self.blob_name(digest.hexdigest(), os.path.splitext(name)[1].lower())
+        if self.exists(blob_name):
+            # Повторная загрузка: свежий mtime не даст gc_media_blobs удалить
+            # файл, пока новая ссылка на него ещё не закоммичена
+            os.utime(self.path(blob_name))
+        else:
+            self._write_atomic(blob_name, content)
+        return blob_name
+
+    def _write_atomic(self, name, content):
+        # Временный файл + rename: читатель никогда не видит недописанный blob,
+        # а две одновременные загрузки одного файла просто пишут одно и то же
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                content.seek(0)
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            else:
+                os.chmod(temp_path, 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+def blob_storage():
+    """Для storage= у полей: настройка STORAGES['media_blobs'] читается при обращении."""
+    return storages['media_blobs']
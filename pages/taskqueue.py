@@ -0,0 +1,170 @@
+"""
+Очередь фоновых задач на базе данных — без внешнего брокера.
+
+    @task(max_attempts=3)
+    def refresh_renditions_task(model_label, pk): ...
+
+    refresh_renditions_task.enqueue('pages.product', product.pk)
+
+Задача — строка Task, вставленная в той же транзакции, что и данные:
+воркер увидит её только после коммита, а откат отменит и её. Аргументы
+должны сериализоваться в JSON.
+
+manage.py run_worker забирает задачи пачками (status = running,
+locked_until = сейчас + visibility timeout) и выполняет их в пуле
+процессов. Успешные задачи удаляются, упавшие возвращаются в очередь с
+экспоненциальной задержкой, исчерпавшие попытки остаются со статусом
+failed (видны в админке). Если воркер умер, его задачи после
+locked_until заберёт другой, поэтому задачи должны быть идемпотентны.
+
+TASK_QUEUE_EAGER = True выполняет задачи сразу после коммита в том же
+процессе — для разработки без запущенного воркера.
+"""
+import traceback
+import uuid
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from pages.models import Task
+
+
+DEFAULT_MAX_ATTEMPTS = 5
+# Задержка перед повтором: 10 с, 20 с, 40 с ... но не больше часа
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 3600
+VISIBILITY_TIMEOUT = 300
+MAX_ERROR_LENGTH = 4000
+
+
+def task(max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Помечает функцию как задачу очереди и добавляет ей .enqueue(*args, **kwargs)."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.enqueue = partial(enqueue, func)
+        return func
+    return decorator
+
+
+def _eager():
+    return getattr(settings, 'TASK_QUEUE_EAGER', False)
+
+
+def _task_row(func, args, kwargs):
+    return Task(name=func.task_name, args=list(args), kwargs=kwargs, max_attempts=func.max_attempts)
+
+
+def enqueue(func, *args, **kwargs):
+    if _eager():
+        transaction.on_commit(partial(func, *args, **kwargs))
+        return None
+    task_row = _task_row(func, args, kwargs)
+    task_row.save()
+    return task_row
+
+
+def enqueue_many(func, calls):
+    """Ставит func(*args) для каждого набора args из calls одним bulk_create."""
+    calls = [tuple(args) for args in calls]
+    if _eager():
+        for args in calls:
+            transaction.on_commit(partial(func, *args))
+        return
+    Task.objects.bulk_create([_task_row(func, args, {}) for args in calls], batch_size=1000)
+
+
+def _claimable(now):
+    # Свободные задачи и задачи, чей воркер не продлил аренду вовремя
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def claim_tasks(worker_id, limit, visibility_timeout=VISIBILITY_TIMEOUT):
+    """
+    Забирает до limit готовых задач. Каждая пачка помечается своим токеном
+    в locked_by: по нему воркер находит свои строки, а завершение задачи,
+    которую уже перехватил другой воркер, ничего не меняет.
+    """
+    now = timezone.now()
+    token = f'{worker_id}:{uuid.uuid4().hex[:8]}'
+    with transaction.atomic():
+        # На PostgreSQL — SKIP LOCKED; SQLite сериализует запись сам,
+        # а повторная проверка условия в update не даёт забрать задачу дважды
+        candidates = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by('run_after', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not candidates:
+            return []
+        Task.objects.filter(_claimable(now), pk__in=candidates).update(
+            status='running',
+            locked_by=token,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(locked_by=token).order_by('run_after', 'pk'))
+
+
+def extend_lease(tokens, visibility_timeout=VISIBILITY_TIMEOUT):
+    """Продлевает аренду задач, которые ещё выполняются."""
+    if tokens:
+        Task.objects.filter(locked_by__in=tokens, status='running').update(
+            locked_until=timezone.now() + timedelta(seconds=visibility_timeout)
+        )
+
+
+def _tidy_connections():
+    # Как между запросами: закрыть сломанные и устаревшие соединения
+    # (внутри транзакции — например, в тестах — трогать их нельзя)
+    if not transaction.get_connection().in_atomic_block:
+        close_old_connections()
+
+
+def execute(name, args, kwargs):
+    """
+    Выполняет задачу (в процессе пула или в самом воркере).
+    Возвращает None при успехе или текст traceback.
+    """
+    _tidy_connections()
+    try:
+        func = import_string(name)
+        if getattr(func, 'task_name', None) != name:
+            raise ImportError(f'{name} не помечена @task')
+        func(*args, **kwargs)
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        _tidy_connections()
+    return None
+
+
+def complete_task(task_row, error=None):
+    """Успех — задача удаляется; ошибка — повтор с задержкой или failed."""
+    mine = Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by)
+    if error is None:
+        mine.delete()
+        return 'done'
+    error = error[-MAX_ERROR_LENGTH:]
+    if task_row.attempts >= task_row.max_attempts:
+        mine.update(status='failed', locked_until=None, last_error=error)
+        return 'failed'
+    delay = min(RETRY_DELAY * 2 ** (task_row.attempts - 1), MAX_RETRY_DELAY)
+    mine.update(
+        status='queued', locked_by='', locked_until=None, last_error=error,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    return 'retry'
+
+
+def retry_failed(queryset):
+    """Возвращает упавшие задачи в очередь с чистым счётчиком попыток."""
+    return queryset.filter(status='failed').update(
+        status='queued', attempts=0, run_after=timezone.now(), locked_by='', locked_until=None,
+    )
@@ -0,0 +1,19 @@
+from django import template
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+from pages.admin_mixins import fast_date_hierarchy
+
+
+register = template.Library()
+
+
+@register.tag(name='fast_date_hierarchy')
+def fast_date_hierarchy_tag(parser, token):
+    """Иерархия дат на кэшированных корзинах (см. pages/admin_mixins.py)."""
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=fast_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
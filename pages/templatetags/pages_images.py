@@ -0,0 +1,73 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from pages.images import RENDITION_FORMATS, RENDITION_WIDTHS
+
+
+register = template.Library()
+
+
+def _with_placeholder(obj, attrs):
+    """
+    Ленивой картинке — размытая заглушка фоном (Product.image_placeholder):
+    место в сетке занято сразу, а фон снимается, когда загрузится сама
+    картинка (иначе он просвечивал бы сквозь прозрачный PNG).
+    """
+    placeholder = getattr(obj, 'image_placeholder', '')
+    if not placeholder or attrs.get('loading') != 'lazy':
+        return
+    attrs.setdefault('decoding', 'async')
+    style = attrs.get('style', '').strip()
+    if style and not style.endswith(';'):
+        style += ';'
+    attrs['style'] = (
+        f'{style}background-size: cover; background-position: center; '
+        f'background-repeat: no-repeat; background-image: url("{placeholder}")'
+    )
+    attrs['onload'] = "this.style.removeProperty('background-image')"
+
+
+@register.simple_tag
+def picture(obj, size='card', sizes=None, **attrs):
+    """
+    <picture> по рендициям obj.image (Product, Category):
+
+        {% picture product 'card' sizes='(max-width: 576px) 50vw, 240px' alt=product.name loading='lazy' %}
+
+    size — рендиция для src запасного <img>; sizes — ширина картинки в
+    вёрстке, по ней браузер выбирает файл из srcset. width/height берутся
+    из рендиции (или размеров оригинала у товара): по ним браузер
+    резервирует место до загрузки и вёрстка не прыгает. При loading='lazy'
+    под картинкой — заглушка товара. Пока рендиций нет (не собраны или
+    файл битый) — обычный <img> на оригинал; без картинки тег ничего не
+    выводит.
+    """
+    if not obj.image:
+        return ''
+    _with_placeholder(obj, attrs)
+    renditions = (obj.renditions or {}).get('sizes')
+    if not renditions:
+        if getattr(obj, 'image_width', None) and getattr(obj, 'image_height', None):
+            attrs.setdefault('width', obj.image_width)
+            attrs.setdefault('height', obj.image_height)
+        return format_html('<img src="{}"{}>', obj.image.url, flatatt(attrs))
+
+    available = [renditions[name] for name in RENDITION_WIDTHS if name in renditions]
+    chosen = renditions.get(size) or available[-1]
+    attrs['sizes'] = sizes or f'{chosen["width"]}px'
+    attrs.setdefault('width', chosen['width'])
+    attrs.setdefault('height', chosen['height'])
+
+    def srcset(fmt):
+        return ', '.join(f'{rendition[fmt]} {rendition["width"]}w' for rendition in available)
+
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, srcset(fmt), attrs['sizes']) for fmt in RENDITION_FORMATS if fmt != 'jpeg'),
+    )
+    # display: contents — <picture> не влияет на вёрстку, стили img работают как раньше
+    return format_html(
+        '<picture style="display: contents">{}<img src="{}" srcset="{}"{}></picture>',
+        sources, chosen['jpeg'], srcset('jpeg'), flatatt(attrs),
+    )
@@ -7,6 +7,7 @@ app_name = "shop"
 urlpatterns = [
     path('', views.home, name='home'),
     path('courier/', views.courier_page, name='courier_page'),
+    path('api/courier/status/', views.courier_update_status, name='courier_update_status'),
     path('cart/', views.cart, name='cart'),
     path('cart/add/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
     path('remove-from-cart/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
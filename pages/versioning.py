@@ -0,0 +1,25 @@
+"""
+Версии наборов данных в django cache.
+
+Кэши в памяти процесса (промокоды, акции) сверяют свою версию с общей
+и перестраиваются, когда она меняется. При нескольких процессах нужен
+общий бэкенд кэша (Redis, Memcached, база), иначе каждый видит свою.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def current_version(key):
+    """Текущая версия; при первом обращении создаётся случайная."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Сменить версию после коммита текущей транзакции."""
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None))
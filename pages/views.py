@@ -14,6 +14,12 @@ from decimal import Decimal
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils import timezone
+from django.db import transaction
+from .archive import order_history
+from .courier import MAX_UPDATES_PER_REQUEST, apply_status_updates
+from .promos import PromoError, available_promos, parse_amount, quote_promo, redeem_promo
+from .promotions import evaluate_cart
+from .ratelimit import rate_limit
 
 
 CATEGORY_META = {
@@ -145,49 +151,36 @@ def home(request):
     return render(request, 'home.html', context)
 
 
+@rate_limit('10/m', burst=5)
 @csrf_exempt
 def apply_promo_code(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             code = data.get('code', '').strip().upper()
-            order_amount = float(data.get('order_amount', 0))
-            delivery_cost = float(data.get('delivery_cost', 0))
+            order_amount = parse_amount(data.get('order_amount', 0))
+            delivery_cost = parse_amount(data.get('delivery_cost', 0))
 
-            if not code:
-                return JsonResponse({'success': False, 'message': 'Введите промокод'}, status=400)
-            if order_amount <= 0:
-                return JsonResponse({'success': False, 'message': 'Неверная сумма заказа'}, status=400)
-
-            try:
-                promo = PromoCode.objects.get(code=code)
-            except PromoCode.DoesNotExist:
-                return JsonResponse({'success': False, 'message': 'Промокод не найден'}, status=404)
-
-            is_valid, message = promo.is_valid()
-            if not is_valid:
-                return JsonResponse({'success': False, 'message': message}, status=400)
-
-            discount_amount, free_shipping, discount_message = promo.calculate_discount(order_amount, delivery_cost)
-
-            if discount_amount == 0 and not free_shipping:
-                return JsonResponse({'success': False, 'message': discount_message}, status=400)
+            # Проверка и расчёт — в памяти, без запросов к базе
+            quote = quote_promo(code, order_amount, delivery_cost)
 
             return JsonResponse({
                 'success': True,
-                'message': f'✅ Промокод применен! {discount_message}',
+                'message': f'✅ Промокод применен! {quote.message}',
                 'data': {
-                    'code': promo.code,
-                    'discount_type': promo.discount_type,
-                    'discount_amount': float(discount_amount),
-                    'original_amount': order_amount,
-                    'delivery_cost': delivery_cost,
-                    'free_shipping': free_shipping,
-                    'final_amount': order_amount - discount_amount + (0 if free_shipping else delivery_cost),
-                    'description': promo.get_discount_display()
+                    'code': quote.rule.code,
+                    'discount_type': quote.rule.discount_type,
+                    'discount_amount': float(quote.discount_amount),
+                    'original_amount': float(order_amount),
+                    'delivery_cost': float(delivery_cost),
+                    'free_shipping': quote.free_shipping,
+                    'final_amount': float(quote.final_amount),
+                    'description': quote.rule.display
                 }
             })
 
+        except PromoError as e:
+            return JsonResponse({'success': False, 'message': e.message}, status=e.status)
         except json.JSONDecodeError:
             return JsonResponse({'success': False, 'message': 'Неверный формат данных'}, status=400)
         except Exception as e:
@@ -302,27 +295,19 @@ def cart(request):
 
     cart_items = cart_items.select_related('product')
     subtotal = sum(item.product.price * item.quantity for item in cart_items)
+    promotions = evaluate_cart(cart_items)
     shipping = 0
-    total = subtotal + shipping
-
-    now = timezone.now()
-    available_promos = PromoCode.objects.filter(
-        is_active=True
-    ).filter(
-        Q(valid_from__lte=now) | Q(valid_from__isnull=True)
-    ).filter(
-        Q(valid_until__gte=now) | Q(valid_until__isnull=True)
-    ).exclude(
-        usage_limit__isnull=False,
-        times_used__gte=F('usage_limit')
-    ).order_by('-created_at')[:10]
+    total = subtotal - promotions.discount + shipping
 
     context = {
         'cart_items': cart_items,
         'subtotal': subtotal,
         'shipping': shipping,
         'total': total,
+        'promotions': promotions,
         'item_count': sum(item.quantity for item in cart_items),
+        # Функция, а не список: шаблон вызовет её только если выводит промокоды,
+        # и тогда список придёт из кэша без запросов к базе
         'available_promos': available_promos,
     }
     return render(request, 'cart.html', context)
@@ -439,56 +424,65 @@ def zakaz_view(request):
         delivery_distance = request.POST.get('delivery_distance', 0)
         delivery_cost = request.POST.get('delivery_cost', 0)
         promo_code = request.POST.get('promo_code', '').strip().upper()
-        discount_amount = request.POST.get('discount_amount', 0)
 
         try:
             delivery_distance = int(delivery_distance)
             delivery_cost = int(delivery_cost)
-            discount_amount = float(discount_amount)
         except (ValueError, TypeError):
             delivery_distance = 0
             delivery_cost = 0
-            discount_amount = 0
 
+        cart_items = cart_items.select_related('product')
         total_amount = sum(item.get_subtotal() for item in cart_items)
 
-        promo_obj = None
+        # Скидку считаем на сервере, а не берём из формы:
+        # сначала автоматические акции, затем промокод — на остаток
+        promotions = evaluate_cart(cart_items)
+        promo_quote = None
+        discount_amount = promotions.discount
         if promo_code:
             try:
-                promo_obj = PromoCode.objects.get(code=promo_code)
-            except PromoCode.DoesNotExist:
-                pass
+                promo_quote = quote_promo(promo_code, promotions.total, Decimal(delivery_cost))
+            except PromoError as e:
+                messages.error(request, e.message)
+                return redirect('shop:zakaz')
+            discount_amount += promo_quote.discount_amount
+            if promo_quote.free_shipping:
+                delivery_cost = 0
+
+        user = request.user if request.user.is_authenticated else None
+        try:
+            # Заказ, позиции и списание промокода — одной транзакцией
+            with transaction.atomic():
+                order = Order.objects.create(
+                    user=user,
+                    total_amount=total_amount,
+                    delivery_city=delivery_city,
+                    delivery_distance=delivery_distance,
+                    delivery_cost=delivery_cost,
+                    discount_amount=discount_amount,
+                    promo_code_id=promo_quote.rule.id if promo_quote else None,
+                    status='processing'
+                )
 
-        order = Order.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            total_amount=total_amount,
-            delivery_city=delivery_city,
-            delivery_distance=delivery_distance,
-            delivery_cost=delivery_cost,
-            discount_amount=discount_amount,
-            promo_code=promo_obj,
-            status='processing'
-        )
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product=item.product,
+                        quantity=item.quantity,
+                        price=item.product.price
+                    )
+                    for item in cart_items
+                ])
 
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price
-            )
-
-        if promo_obj:
-            promo_obj.use()
-            PromoCodeUsage.objects.create(
-                promo_code=promo_obj,
-                order=order,
-                order_amount=total_amount,
-                discount_amount=discount_amount,
-                user=request.user if request.user.is_authenticated else None
-            )
+                if promo_quote:
+                    redeem_promo(promo_quote.rule.id, order, total_amount, promo_quote.discount_amount, user)
+
+                cart_items.delete()
+        except PromoError as e:
+            messages.error(request, e.message)
+            return redirect('shop:zakaz')
 
-        cart_items.delete()
         messages.success(request, 'Vash zakaz uspeshno oformlen!')
         return redirect('shop:moizakazu')
 
@@ -513,7 +507,7 @@ def create_order(request):
 
 @login_required
 def moizakazu(request):
-    orders = Order.objects.filter(user=request.user).prefetch_related('items__product')
+    orders = order_history(request.user)
     return render(request, 'moizakazu.html', {'orders': orders})
 
 
@@ -638,8 +632,42 @@ def balance_view(request):
     return render(request, 'balance.html')
 
 
+@login_required(login_url='shop:login')
 def courier_page(request):
-    return render(request, 'courier.html')
+    if not request.user.has_perm('pages.change_order'):
+        return render(request, 'courier.html', {'orders': []}, status=403)
+    orders = Order.objects.filter(
+        status__in=['processing', 'shipping']
+    ).prefetch_related('items__product').order_by('created_at')
+    return render(request, 'courier.html', {'orders': orders})
+
+
+@login_required(login_url='shop:login')
+@require_POST
+def courier_update_status(request):
+    """
+    Массовая смена статусов заказов курьером.
+    Принимает JSON: {"updates": [{"order_number": "...", "status": "delivered"}, ...]}
+    """
+    if not request.user.has_perm('pages.change_order'):
+        return JsonResponse({'success': False, 'error': 'Нет доступа'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        updates = [(item['order_number'], item['status']) for item in data.get('updates', [])]
+    except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Неверный формат данных'}, status=400)
+
+    if not updates:
+        return JsonResponse({'success': False, 'error': 'Пустой список обновлений'}, status=400)
+    if len(updates) > MAX_UPDATES_PER_REQUEST:
+        return JsonResponse({
+            'success': False,
+            'error': f'Не больше {MAX_UPDATES_PER_REQUEST} заказов за запрос',
+        }, status=400)
+
+    result = apply_status_updates(updates)
+    return JsonResponse({'success': not result['errors'], **result})
 
 
 
@@ -657,6 +685,7 @@ def settings_view(request):
         'settings': user_settings,
     })
 
+@rate_limit('30/m', burst=10)
 @login_required
 @require_POST
 def settings_save(request):
@@ -730,6 +759,7 @@ def settings_save(request):
 
 
 
+@rate_limit('10/m', burst=5)
 @login_required
 def change_name(request):
     if request.method != 'POST':
@@ -743,6 +773,7 @@ def change_name(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@rate_limit('10/m', burst=5)
 @login_required
 def change_email(request):
     if request.method != 'POST':
@@ -755,6 +786,7 @@ def change_email(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@rate_limit('10/m', burst=5)
 @login_required
 def change_username(request):
     if request.method != 'POST':
@@ -771,6 +803,7 @@ def change_username(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@rate_limit('10/m', burst=5)
 @login_required
 def change_password(request):
     if request.method != 'POST':
@@ -791,6 +824,7 @@ def change_password(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@rate_limit('10/m', burst=5)
 @login_required
 def change_phone(request):
     if request.method != 'POST':